@@ -0,0 +1,204 @@
+# Archive of captured screenshots
+#   images are encoded and written by background thread, capture only puts them into bounded queue
+#   file name is hash of pixels, so repeated captures of the same region are stored once
+#   index.jsonl keeps key, file, size and time of last capture, oldest entries are removed by retention
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import PIL.Image
+from PIL import features
+from apps.capture import to_image
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = "index.jsonl"
+EXTENSIONS = ("webp", "png")
+
+
+def find_image(folder: str, key: str) -> str | None:
+    # file of image by its key without loading of index, e.g. for results of history
+    for extension in EXTENSIONS:
+        path = os.path.join(folder, key[:2], f"{key}.{extension}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+class ScreenshotArchive:
+    def __init__(self, folder: str, max_size: int = 512 * 1024 * 1024, max_age: float = 30 * 24 * 3600,
+                 queue_size: int = 16):
+        """
+        :param folder: folder of archive
+        :param max_size: max size of images in bytes, 0 is unlimited
+        :param max_age: max age of last capture of image in seconds, 0 is unlimited
+        :param queue_size: count of images which wait for writing, new images are dropped if queue is full
+        """
+        self.folder = folder
+        self.max_size = max_size
+        self.max_age = max_age
+        # lossless WebP is several times smaller than PNG for screen content
+        self.extension = "webp" if features.check("webp") else "png"
+        self.__queue: queue.Queue[tuple[np.ndarray | PIL.Image.Image, float] | None] = queue.Queue(queue_size)
+        self.__thread: threading.Thread | None = None
+        self.__lock = threading.Lock()
+        # key -> entry, from least recently captured
+        self.__index: OrderedDict[str, dict] = OrderedDict()
+        self.__size = 0
+        self.__index_lines = 0
+        self.dropped = 0
+        self.__load_index()
+
+    @staticmethod
+    def key(image: np.ndarray | PIL.Image.Image) -> str:
+        pixels = np.ascontiguousarray(image)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{pixels.shape}|{pixels.dtype}".encode())
+        digest.update(pixels.data)
+        return digest.hexdigest()
+
+    def submit(self, image: np.ndarray | PIL.Image.Image) -> bool:
+        """
+        Queueing image for writing, caller is never blocked
+        :return: False if image is dropped because queue is full
+        """
+        with self.__lock:
+            if self.__thread is None:
+                # not daemon, so queued images are written before exit of process
+                self.__thread = threading.Thread(target=self.__write_loop, name="screenshot-archive")
+                self.__thread.start()
+        try:
+            self.__queue.put_nowait((image, time.time()))
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("archive queue is full, screenshot is not saved")
+            return False
+        return True
+
+    def path(self, key: str) -> str | None:
+        # file of image or None if image was not saved or is removed by retention
+        with self.__lock:
+            entry = self.__index.get(key)
+        if entry is None:
+            return None
+        path = os.path.join(self.folder, entry["file"])
+        return path if os.path.exists(path) else None
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {"images": len(self.__index), "size": self.__size, "queued": self.__queue.qsize(),
+                    "dropped": self.dropped}
+
+    def flush(self):
+        # wait until queued images are written
+        if self.__thread is not None:
+            self.__queue.join()
+
+    def close(self, wait: bool = True):
+        with self.__lock:
+            thread, self.__thread = self.__thread, None
+        if thread is None:
+            return
+        self.__queue.put(None)
+        if wait:
+            thread.join()
+
+    def __write_loop(self):
+        while True:
+            item = self.__queue.get()
+            try:
+                if item is None:
+                    break
+                self.__write(*item)
+            except OSError as ex:  # e.g. disk is full, next captures are tried again
+                logger.error("screenshot is not saved: %s", ex)
+            finally:
+                self.__queue.task_done()
+
+    def __write(self, image: np.ndarray | PIL.Image.Image, captured_at: float):
+        key = self.key(image)
+        with self.__lock:
+            entry = self.__index.get(key)
+        if entry is not None and os.path.exists(os.path.join(self.folder, entry["file"])):
+            # duplicate, only time of last capture is updated
+            entry = {**entry, "time": captured_at}
+        else:
+            entry = {"key": key, "file": f"{key[:2]}/{key}.{self.extension}", "time": captured_at,
+                     "size": self.__save(image, key)}
+        with self.__lock:
+            previous = self.__index.pop(key, None)
+            self.__size += entry["size"] - (previous["size"] if previous else 0)
+            self.__index[key] = entry
+            self.__append_index(entry)
+            self.__apply_retention(captured_at)
+
+    def __save(self, image: np.ndarray | PIL.Image.Image, key: str) -> int:
+        path = os.path.join(self.folder, key[:2], f"{key}.{self.extension}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if isinstance(image, np.ndarray):
+            image = to_image(image)
+        temp_path = path + ".tmp"
+        if self.extension == "webp":
+            image.save(temp_path, "WEBP", lossless=True)
+        else:
+            image.save(temp_path, "PNG", compress_level=1)
+        os.replace(temp_path, path)
+        return os.path.getsize(path)
+
+    def __apply_retention(self, now: float):
+        removed = False
+        while self.__index:
+            key, entry = next(iter(self.__index.items()))
+            is_old = self.max_age and entry["time"] < now - self.max_age
+            is_over = self.max_size and self.__size > self.max_size
+            if not is_old and not is_over:
+                break
+            self.__index.popitem(last=False)
+            self.__size -= entry["size"]
+            try:
+                os.remove(os.path.join(self.folder, entry["file"]))
+            except FileNotFoundError:
+                pass
+            removed = True
+        # index is append only, it is rewritten when it has much more lines than entries
+        if removed or self.__index_lines > len(self.__index) * 2 + 100:
+            self.__compact_index()
+
+    def __index_path(self) -> str:
+        return os.path.join(self.folder, INDEX_NAME)
+
+    def __load_index(self):
+        entries = {}
+        try:
+            with open(self.__index_path(), encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:  # line was not written completely
+                        continue
+                    # later line of the same key is newer
+                    entries[entry["key"]] = entry
+                    self.__index_lines += 1
+        except FileNotFoundError:
+            return
+        for entry in sorted(entries.values(), key=lambda item: item["time"]):
+            self.__index[entry["key"]] = entry
+            self.__size += entry["size"]
+
+    def __append_index(self, entry: dict):
+        os.makedirs(self.folder, exist_ok=True)
+        with open(self.__index_path(), "a", encoding="utf-8") as file:
+            file.write(json.dumps(entry) + "\n")
+        self.__index_lines += 1
+
+    def __compact_index(self):
+        temp_path = self.__index_path() + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.writelines(json.dumps(entry) + "\n" for entry in self.__index.values())
+        os.replace(temp_path, self.__index_path())
+        self.__index_lines = len(self.__index)
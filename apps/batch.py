@@ -0,0 +1,245 @@
+# Headless batch OCR of folder with images
+#   python -m apps.batch INPUT_DIR OUTPUT.jsonl [--workers N] [--languages eng+rus] [--recursive] [--no-coalesce]
+#   results are appended to JSONL as soon as they are ready, already processed files are skipped,
+#   so interrupted run can be continued with the same command, failed files are processed again
+#   and their old records are removed, so there is one record per file
+#   small images (form fields, snippets) are sent to workers in groups and recognized in composites,
+#   see CoalescingScheduler
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import numpy as np
+import PIL.Image
+from apps.coalesce import CoalescingScheduler
+from apps.config import Settings, get_settings
+from apps.pipeline import ExtractionPipeline
+from apps.preprocess import Preprocessor
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp", ".gif")
+# count of small images which are sent to worker together
+COALESCE_GROUP = 32
+
+# pipeline and coalescer of worker process
+_pipeline: ExtractionPipeline | None = None
+_coalescer: CoalescingScheduler | None = None
+
+
+def find_images(folder: str, recursive: bool = False) -> list[str]:
+    # paths relative to folder in stable order
+    if recursive:
+        paths = [os.path.relpath(os.path.join(root, name), folder)
+                 for root, _, names in os.walk(folder) for name in names]
+    else:
+        paths = [entry.name for entry in os.scandir(folder) if entry.is_file()]
+    return sorted(path for path in paths if path.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def read_done(output: str) -> set[str]:
+    """
+    Getting files which are already processed and repairing output of interrupted run:
+    unfinished last line is cut, newline is added to complete last record and records of errors are removed,
+    because their files are processed again. broken lines before last one are skipped, so results after them are kept
+    :return: set of relative paths
+    """
+    done = set()
+    if not os.path.exists(output):
+        return done
+    # numbers of lines with records of errors
+    dropped = set()
+    valid_size = 0
+    is_newline_missing = False
+    with open(output, "rb") as file:
+        for number, line in enumerate(file):
+            try:
+                record = json.loads(line)
+                file_name = record["file"]
+            except (ValueError, KeyError, TypeError):
+                if not line.endswith(b"\n"):
+                    # only the last line can be written partially
+                    break
+                valid_size += len(line)
+                print(f"broken line of {output} is skipped: {line[:80]!r}", file=sys.stderr)
+                continue
+            valid_size += len(line)
+            # complete record without newline, new results would be appended to the same line
+            is_newline_missing = not line.endswith(b"\n")
+            if "error" in record:
+                dropped.add(number)
+            else:
+                done.add(file_name)
+    if dropped:
+        _rewrite(output, dropped, valid_size)
+    elif valid_size != os.path.getsize(output):
+        with open(output, "r+b") as file:
+            file.truncate(valid_size)
+    if is_newline_missing and not dropped:
+        with open(output, "ab") as file:
+            file.write(b"\n")
+    return done
+
+
+def _rewrite(output: str, dropped: set[int], size: int):
+    # output without dropped lines, it replaces output at once, so it is not lost if rewriting is interrupted
+    descriptor, temp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(os.path.abspath(output)))
+    try:
+        with open(output, "rb") as file, open(descriptor, "wb") as temp:
+            for number, line in enumerate(file):
+                if size <= 0:
+                    break
+                size -= len(line)
+                if number not in dropped:
+                    temp.write(line if line.endswith(b"\n") else line + b"\n")
+        shutil.copymode(output, temp_path)
+        os.replace(temp_path, output)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def _init_worker(languages: str, preprocess_profile: str, preprocess_stages: list[str], script_detection: bool):
+    global _pipeline, _coalescer
+    # files are processed in parallel, so one file is recognized by one core
+    _pipeline = ExtractionPipeline(
+        languages,
+        block_parallel=False,
+        preprocessor=Preprocessor.from_profile(preprocess_profile, preprocess_stages),
+        script_detection=script_detection
+    )
+    # groups are recognized synchronously by recognize_many, scheduler does not need its own threads
+    _coalescer = CoalescingScheduler(_pipeline, workers=0)
+
+
+def _is_small(folder: str, file: str) -> bool:
+    # only header is read, image is decoded by worker
+    try:
+        with PIL.Image.open(os.path.join(folder, file)) as image:
+            return CoalescingScheduler.is_small_size(*image.size)
+    except OSError:  # error is recorded by worker
+        return False
+
+
+def _open(folder: str, file: str) -> np.ndarray:
+    with PIL.Image.open(os.path.join(folder, file)) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+def _error(file: str, ex: Exception) -> dict:
+    # recorded, file is tried again on next run
+    return {"file": file, "error": f"{type(ex).__name__}: {ex}"}
+
+
+def _extract(folder: str, file: str) -> list[dict]:
+    start = time.perf_counter()
+    try:
+        text = _pipeline.run(_open(folder, file))
+    except Exception as ex:
+        return [_error(file, ex)]
+    return [{
+        "file": file,
+        "text": text,
+        "languages": _pipeline.languages,
+        "ms": round((time.perf_counter() - start) * 1000, 1),
+    }]
+
+
+def _extract_small(folder: str, files: list[str]) -> list[dict]:
+    # small images are recognized in composites, time is shared equally between them
+    start = time.perf_counter()
+    records, images = {}, {}
+    for file in files:
+        try:
+            images[file] = _open(folder, file)
+        except Exception as ex:
+            records[file] = _error(file, ex)
+    try:
+        texts = _coalescer.recognize_many(list(images.values())) if images else []
+    except Exception as ex:
+        texts = None
+        records.update((file, _error(file, ex)) for file in images)
+    if texts is not None:
+        ms = round((time.perf_counter() - start) * 1000 / len(files), 1)
+        records.update((file, {"file": file, "text": text, "languages": _pipeline.languages, "ms": ms})
+                       for file, text in zip(images, texts))
+    return [records[file] for file in files]
+
+
+def run(folder: str, output: str, workers: int | None = None, languages: str | None = None,
+        recursive: bool = False, settings: Settings | None = None, coalesce: bool = True) -> tuple[int, int]:
+    """
+    Extracting text from all images of folder into JSONL file
+    :param coalesce: small images are recognized in composites, see CoalescingScheduler
+    :return: (count of processed files, count of errors)
+    """
+    settings = settings or get_settings()
+    languages = languages or "+".join(settings.languages)
+    workers = workers or os.cpu_count() or 1
+
+    done = read_done(output)
+    pending = [file for file in find_images(folder, recursive) if file not in done]
+    print(f"{len(pending)} files to process, {len(done)} already done", file=sys.stderr)
+
+    processed = errors = 0
+    with open(output, "a", encoding="utf-8") as out, ProcessPoolExecutor(
+            workers, initializer=_init_worker,
+            initargs=(languages, settings.preprocess_profile, settings.preprocess_stages,
+                      settings.is_script_detection)
+    ) as executor:
+        files = iter(pending)
+        small = []
+        in_flight = set()
+        while True:
+            # bounded count of submitted jobs, so huge folders do not fill memory with futures
+            for file in files:
+                if coalesce and _is_small(folder, file):
+                    small.append(file)
+                    if len(small) < COALESCE_GROUP:
+                        continue
+                    in_flight.add(executor.submit(_extract_small, folder, small))
+                    small = []
+                else:
+                    in_flight.add(executor.submit(_extract, folder, file))
+                if len(in_flight) >= workers * 2:
+                    break
+            else:
+                # last small images which do not fill group
+                if small:
+                    in_flight.add(executor.submit(_extract_small, folder, small))
+                    small = []
+            if not in_flight:
+                break
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            before = processed
+            for future in finished:
+                for record in future.result():
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    processed += 1
+                    errors += "error" in record
+            out.flush()
+            if processed // 100 != before // 100:
+                print(f"{processed}/{len(pending)} files", file=sys.stderr)
+    return processed, errors
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m apps.batch", description="Extract text from folder of images")
+    parser.add_argument("input", help="folder with images")
+    parser.add_argument("output", help="JSONL file with results, it is continued if exists")
+    parser.add_argument("--workers", type=int, default=None, help="count of processes (default: count of cores)")
+    parser.add_argument("--languages", default=None, help="e.g. eng+rus (default: languages from settings)")
+    parser.add_argument("--recursive", action="store_true", help="process subfolders")
+    parser.add_argument("--no-coalesce", action="store_true", help="recognize each small image separately")
+    args = parser.parse_args(argv)
+
+    processed, errors = run(args.input, args.output, args.workers, args.languages, args.recursive,
+                            coalesce=not args.no_coalesce)
+    print(f"done: {processed} files, {errors} errors", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+# Splitting of large captures into blocks along whitespace gutters
+#   blocks are recognized in parallel and stitched back in reading order
+import numpy as np
+
+# difference from background which is counted as ink
+INK_THRESHOLD = 40
+
+
+def ink_mask(gray: np.ndarray) -> np.ndarray:
+    # background is the most common brightness, so it works for light and dark themes
+    background = np.median(gray[::4, ::4])
+    return np.abs(gray.astype(np.int16) - int(background)) > INK_THRESHOLD
+
+
+def blank_runs(is_blank: np.ndarray, min_length: int) -> list[tuple[int, int]]:
+    """
+    Getting runs of blank lines inside of image (runs at the edges are skipped)
+    :return: list of (start, end) of runs
+    """
+    # borders of runs are places where value is changed
+    padded = np.concatenate(([False], is_blank, [False]))
+    changes = np.flatnonzero(padded[1:] != padded[:-1])
+    starts, ends = changes[::2], changes[1::2]
+    keep = ((ends - starts) >= min_length) & (starts > 0) & (ends < len(is_blank))
+    return list(zip(starts[keep].tolist(), ends[keep].tolist()))
+
+
+def choose_cuts(runs: list[tuple[int, int]], length: int, count: int) -> list[int]:
+    # cut in the middle of gutters which are closest to equal parts
+    if count <= 1 or not runs:
+        return []
+    centers = np.array([(start + end) // 2 for start, end in runs])
+    cuts = set()
+    for i in range(1, count):
+        target = length * i // count
+        cuts.add(int(centers[np.abs(centers - target).argmin()]))
+    return sorted(cuts)
+
+
+def split_blocks(gray: np.ndarray, count: int, min_row_gap: int = 6,
+                 min_column_gap: int = 40) -> list[tuple[slice, slice]]:
+    """
+    Splitting image into about count blocks in reading order.
+    Image is split into columns by gutters through the whole height,
+    then each column is split into strips by blank rows, so text is never cut
+    :param gray: grayscale image
+    :param count: wanted count of blocks
+    :return: list of (rows, columns) slices
+    """
+    height, width = gray.shape
+    ink = ink_mask(gray)
+
+    # columns, too narrow columns are more likely cells of table than columns of text
+    min_column_width = width // 5
+    column_edges = [0]
+    for cut in choose_cuts(blank_runs(~ink.any(axis=0), min_column_gap), width, count):
+        if cut - column_edges[-1] >= min_column_width and width - cut >= min_column_width:
+            column_edges.append(cut)
+    column_edges.append(width)
+    columns = [slice(start, end) for start, end in zip(column_edges[:-1], column_edges[1:])]
+
+    blocks = []
+    # every column gets part of blocks by its width
+    for columns_slice in columns:
+        strips = max(1, round(count * (columns_slice.stop - columns_slice.start) / width))
+        rows_blank = ~ink[:, columns_slice].any(axis=1)
+        row_cuts = choose_cuts(blank_runs(rows_blank, min_row_gap), height, strips)
+        row_edges = [0, *row_cuts, height]
+        for start, end in zip(row_edges[:-1], row_edges[1:]):
+            # skip strips without any text
+            if not rows_blank[start:end].all():
+                blocks.append((slice(start, end), columns_slice))
+    return blocks
+
+
+def split_lines(gray: np.ndarray, min_gap: int = 2) -> list[slice]:
+    """
+    Splitting image into text lines, lines are separated by at least min_gap blank rows
+    :param gray: grayscale image
+    :return: slices of rows from the first to the last row with ink of each line, from top to bottom
+    """
+    rows = np.flatnonzero(ink_mask(gray).any(axis=1))
+    if not rows.size:
+        return []
+    breaks = np.flatnonzero(np.diff(rows) > min_gap)
+    starts = rows[np.concatenate(([0], breaks + 1))]
+    ends = rows[np.concatenate((breaks, [rows.size - 1]))] + 1
+    return [slice(start, end) for start, end in zip(starts.tolist(), ends.tolist())]
@@ -0,0 +1,168 @@
+# Content addressed cache of OCR results
+#   key is hash of pixels, languages and OCR config, so identical captures skip recognition
+#   memory tier is LRU, optional disk tier is evicted by size (least recently used files first)
+#   disk tier is only an optimization, its errors are logged and the result is recognized again
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class OcrCache:
+    def __init__(self, memory_items: int = 256, folder: str | None = None,
+                 disk_limit: int = 64 * 1024 * 1024):
+        """
+        :param memory_items: count of results in memory
+        :param folder: folder of disk tier, disk tier is disabled if None
+        :param disk_limit: max size of disk tier in bytes
+        """
+        self.memory_items = memory_items
+        self.folder = folder
+        self.disk_limit = disk_limit
+        self.__memory: OrderedDict[str, str] = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__disk_size = 0
+        # keys which are written to disk outside of lock
+        self.__writing: set[str] = set()
+
+        # counters
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.folder is not None:
+            os.makedirs(self.folder, exist_ok=True)
+            # temporary files of writes which were interrupted, e.g. app was killed
+            for entry in os.scandir(self.folder):
+                if entry.name.endswith(".tmp"):
+                    self.__remove(entry.path)
+            self.__disk_size = sum(entry.stat().st_size for entry in self.__disk_entries())
+
+    @staticmethod
+    def key(image: np.ndarray, languages: str, config: str = "") -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{image.shape}|{image.dtype}|{languages}|{config}".encode())
+        digest.update(np.ascontiguousarray(image).data)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> str | None:
+        with self.__lock:
+            text = self.__memory.get(key)
+            if text is not None:
+                self.__memory.move_to_end(key)
+                self.hits += 1
+                return text
+            text = self.__read_disk(key)
+            if text is not None:
+                self.__put_memory(key, text)
+                self.hits += 1
+                self.disk_hits += 1
+                return text
+            self.misses += 1
+            return None
+
+    def put(self, key: str, text: str):
+        with self.__lock:
+            self.__put_memory(key, text)
+            if self.folder is None or key in self.__writing or os.path.exists(self.__path(key)):
+                return
+            self.__writing.add(key)
+        # slow disk does not block other captures
+        size = self.__write_disk(key, text)
+        with self.__lock:
+            self.__writing.discard(key)
+            self.__disk_size += size
+            if self.__disk_size > self.disk_limit:
+                self.__evict_disk()
+
+    def stats(self) -> dict:
+        with self.__lock:
+            requests = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requests if requests else 0.0,
+                "memory_items": len(self.__memory),
+                "disk_size": self.__disk_size,
+            }
+
+    def clear(self):
+        with self.__lock:
+            self.__memory.clear()
+            for entry in self.__disk_entries():
+                self.__remove(entry.path)
+            self.__disk_size = 0
+
+    def __put_memory(self, key: str, text: str):
+        self.__memory[key] = text
+        self.__memory.move_to_end(key)
+        while len(self.__memory) > self.memory_items:
+            self.__memory.popitem(last=False)
+
+    def __path(self, key: str) -> str:
+        return os.path.join(self.folder, key + ".txt")
+
+    def __disk_entries(self) -> list[os.DirEntry]:
+        if self.folder is None or not os.path.isdir(self.folder):
+            return []
+        return [entry for entry in os.scandir(self.folder) if entry.name.endswith(".txt")]
+
+    def __read_disk(self, key: str) -> str | None:
+        if self.folder is None:
+            return None
+        path = self.__path(key)
+        try:
+            with open(path, encoding="utf-8") as file:
+                text = file.read()
+            # mark file as recently used for eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, UnicodeDecodeError) as e:
+            logger.warning("cache entry %s is not read: %s", path, e)
+            return None
+        return text
+
+    def __write_disk(self, key: str, text: str) -> int:
+        """
+        Writing entry to temporary file which replaces entry, so entry is never seen partly written
+        :return: size of written entry, 0 if it is not written
+        """
+        data = text.encode("utf-8")
+        temp_path = None
+        try:
+            descriptor, temp_path = tempfile.mkstemp(suffix=".tmp", prefix=key, dir=self.folder)
+            with open(descriptor, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, self.__path(key))
+        except OSError as e:  # e.g. disk is full, capture does not fail
+            logger.warning("cache entry %s is not written: %s", key, e)
+            if temp_path is not None:
+                self.__remove(temp_path)
+            return 0
+        return len(data)
+
+    @staticmethod
+    def __remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:  # e.g. file is opened by other process on Windows
+            logger.warning("cache entry %s is not removed: %s", path, e)
+
+    def __evict_disk(self):
+        # remove least recently used files until cache is smaller than 90% of limit
+        entries = sorted(((entry.stat(), entry.path) for entry in self.__disk_entries()),
+                         key=lambda item: item[0].st_mtime)
+        for stat, path in entries:
+            if self.__disk_size <= self.disk_limit * 0.9:
+                break
+            self.__remove(path)
+            self.__disk_size -= stat.st_size
@@ -0,0 +1,91 @@
+# Capture of screen regions into NumPy arrays
+#   MssBackend keeps one mss handle open and returns BGRA view of its buffer without copy,
+#   PillowBackend (ImageGrab) is used as fallback and returns RGB array
+#   regions are in physical pixels of virtual desktop, map_to_physical converts rectangles of Qt
+import numpy as np
+
+try:
+    import mss
+    import mss.exception
+except ImportError:  # optional dependency, Pillow is used instead
+    mss = None
+
+
+class CaptureBackend:
+    name = "base"
+
+    def grab(self, left: int, top: int, width: int, height: int) -> np.ndarray:
+        """
+        Capturing region of virtual desktop
+        :return: uint8 array height x width x channels, BGRA or RGB
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MssBackend(CaptureBackend):
+    name = "mss"
+
+    def __init__(self):
+        if mss is None:
+            raise RuntimeError("mss is not installed")
+        # device contexts are created once, handle must be used by thread which created it
+        try:
+            self.__handle = mss.mss()
+        except mss.exception.ScreenShotError as ex:  # e.g. display is not available
+            raise RuntimeError(f"mss can not be started: {ex}") from ex
+
+    def grab(self, left: int, top: int, width: int, height: int) -> np.ndarray:
+        shot = self.__handle.grab({"left": left, "top": top, "width": width, "height": height})
+        # raw is bytearray of BGRA pixels, array shares it
+        return np.frombuffer(shot.raw, np.uint8).reshape(shot.height, shot.width, 4)
+
+    def close(self):
+        self.__handle.close()
+
+
+class PillowBackend(CaptureBackend):
+    name = "pillow"
+
+    def grab(self, left: int, top: int, width: int, height: int) -> np.ndarray:
+        from PIL import ImageGrab
+        image = ImageGrab.grab(bbox=(left, top, left + width, top + height), all_screens=True)
+        return np.asarray(image.convert("RGB"))
+
+
+def to_image(image: np.ndarray):
+    """
+    Converting captured array to PIL image, BGRA buffer of mss is read without copy
+    :return: PIL image in RGB or L mode
+    """
+    import PIL.Image
+    height, width = image.shape[:2]
+    if image.ndim == 3 and image.shape[2] == 4:
+        return PIL.Image.frombuffer("RGB", (width, height), np.ascontiguousarray(image), "raw", "BGRX", 0, 1)
+    return PIL.Image.fromarray(image)
+
+
+def create_backend(name: str = "mss") -> CaptureBackend:
+    if name == "mss":
+        try:
+            return MssBackend()
+        except RuntimeError:
+            pass
+    return PillowBackend()
+
+
+def map_to_physical(rect, screen) -> tuple[int, int, int, int]:
+    """
+    Converting rectangle of Qt to physical pixels of virtual desktop
+    :param rect: QRect in global logical coordinates
+    :param screen: QScreen which contains rectangle
+    :return: (left, top, width, height)
+    """
+    # Qt keeps native origin of each screen and scales only offsets inside it
+    origin = screen.geometry().topLeft()
+    ratio = screen.devicePixelRatio()
+    left = origin.x() + round((rect.left() - origin.x()) * ratio)
+    top = origin.y() + round((rect.top() - origin.y()) * ratio)
+    return left, top, max(1, round(rect.width() * ratio)), max(1, round(rect.height() * ratio))
@@ -0,0 +1,187 @@
+# Coalescing of small images into one OCR call
+#   start of recognition costs more than recognition of small crop (form field, table cell, snippet),
+#   so queued crops are preprocessed, stacked into one composite image with blank gaps between them,
+#   recognized once and words are split back to crops by their vertical position
+import bisect
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future
+import numpy as np
+from apps.pipeline import ExtractionPipeline
+from apps.preprocess import invert_dark
+from apps.words import WordBoxes
+
+logger = logging.getLogger(__name__)
+
+
+class CoalescingScheduler:
+    # bigger images are recognized alone, they are not small enough to win from coalescing
+    max_crop_height = 160
+    max_crop_width = 2000
+
+    def __init__(self, pipeline: ExtractionPipeline, workers: int = 1, max_batch: int = 64,
+                 max_wait: float = 0.01, max_height: int = 4000, gap: int = 24, executor: Executor | None = None):
+        """
+        :param pipeline: pipeline which preprocesses crops and recognizes composite
+        :param workers: count of composites which are recognized at the same time
+        :param max_batch: max count of crops in one composite
+        :param max_wait: seconds which first submitted crop waits for others
+        :param max_height: max height of composite in pixels
+        :param gap: blank rows between crops, tesseract does not join text of neighbour crops
+        :param executor: composites are recognized by workers of executor instead of own workers,
+            so they share count of parallel recognitions (and warmed up engines) with other images
+        """
+        self.pipeline = pipeline
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_height = max_height
+        self.gap = gap
+        self.__executor = executor
+        self.__queue: queue.Queue[tuple[np.ndarray, Future] | None] = queue.Queue()
+
+        # stats, lock is used by workers, so it is created before them
+        self.__stats_lock = threading.Lock()
+        self.crops = 0
+        self.composites = 0
+
+        self.__threads = [
+            threading.Thread(target=self.__run, name=f"ocr-coalesce-{index}", daemon=True)
+            # one thread only collects batches for executor
+            for index in range(1 if executor is not None else workers)
+        ]
+        for thread in self.__threads:
+            thread.start()
+
+    def is_small(self, image: np.ndarray) -> bool:
+        height, width = image.shape[:2]
+        return self.is_small_size(width, height)
+
+    @classmethod
+    def is_small_size(cls, width: int, height: int) -> bool:
+        # size can be checked before image is decoded, e.g. from header of file
+        return height <= cls.max_crop_height and width <= cls.max_crop_width
+
+    def submit(self, image: np.ndarray) -> Future:
+        """
+        Queueing image to be recognized with other images which are submitted at about the same time
+        :return: future of text of image
+        """
+        future = Future()
+        self.__queue.put((image, future))
+        return future
+
+    def recognize_many(self, images: list[np.ndarray]) -> list[str]:
+        """
+        Recognizing images in composites of up to max_batch images
+        :return: texts in order of images
+        """
+        crops = [self.__prepare(image) for image in images]
+        texts = []
+        start = 0
+        while start < len(crops):
+            end = start + 1
+            height = crops[start].shape[0]
+            while end < len(crops) and end - start < self.max_batch:
+                height += self.gap + crops[end].shape[0]
+                if height > self.max_height:
+                    break
+                end += 1
+            texts.extend(self.__recognize(crops[start:end]))
+            start = end
+        return texts
+
+    def stats(self) -> dict:
+        with self.__stats_lock:
+            return {"crops": self.crops, "composites": self.composites,
+                    "crops_per_composite": round(self.crops / self.composites, 1) if self.composites else None}
+
+    def close(self):
+        for _ in self.__threads:
+            self.__queue.put(None)
+        for thread in self.__threads:
+            thread.join()
+
+    def stitch(self, crops: list[np.ndarray]) -> tuple[np.ndarray, list[int]]:
+        """
+        Stacking gray crops under each other on white background
+        :return: composite and top row of each crop in it
+        """
+        width = max(crop.shape[1] for crop in crops) + 2 * self.gap
+        height = sum(crop.shape[0] for crop in crops) + (len(crops) + 1) * self.gap
+        composite = np.full((height, width), 255, np.uint8)
+        tops = []
+        top = self.gap
+        for crop in crops:
+            composite[top:top + crop.shape[0], self.gap:self.gap + crop.shape[1]] = crop
+            tops.append(top)
+            top += crop.shape[0] + self.gap
+        return composite, tops
+
+    @staticmethod
+    def split(words: WordBoxes, tops: list[int]) -> list[str]:
+        # word belongs to crop which contains its vertical center, crops are separated by gaps
+        centers = words.boxes[:, 1] + words.boxes[:, 3] // 2
+        indexes = [[] for _ in tops]
+        for index, center in enumerate(centers.tolist()):
+            indexes[max(0, bisect.bisect_right(tops, center) - 1)].append(index)
+        return [words.take(np.array(crop_indexes, np.intp)).to_text() for crop_indexes in indexes]
+
+    def __prepare(self, image: np.ndarray) -> np.ndarray:
+        # all crops are dark text on light background, so one composite is recognized as one page
+        return invert_dark(self.pipeline.preprocessor(image))
+
+    def __recognize(self, crops: list[np.ndarray]) -> list[str]:
+        composite, tops = self.stitch(crops)
+        # the same composite is not formed again, so it is not cached; crops can be of different scripts,
+        # script of composite is the script of most of them, so languages are not reduced by it
+        words = self.pipeline.run_words(composite, preprocess=False, cache=False, detect_script=False)
+        texts = self.split(words, tops)
+        with self.__stats_lock:
+            self.crops += len(crops)
+            self.composites += 1
+        return texts
+
+    def __take_batch(self, first: tuple[np.ndarray, Future]) -> list[tuple[np.ndarray, Future]]:
+        # crops which are submitted while first one waits are recognized together
+        batch = [first]
+        height = first[0].shape[0]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch and height < self.max_height:
+            try:
+                item = self.__queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+            except queue.Empty:
+                break
+            if item is None:
+                # stop signal is returned for this or other worker
+                self.__queue.put(None)
+                break
+            batch.append(item)
+            height += self.gap + item[0].shape[0]
+        return batch
+
+    def __run(self):
+        while True:
+            item = self.__queue.get()
+            if item is None:
+                return
+            batch = [(image, future) for image, future in self.__take_batch(item)
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            if self.__executor is not None:
+                self.__executor.submit(self.__complete, batch)
+            else:
+                self.__complete(batch)
+
+    def __complete(self, batch: list[tuple[np.ndarray, Future]]):
+        try:
+            texts = self.recognize_many([image for image, _ in batch])
+        except Exception as ex:  # e.g. tesseract is failed, error is raised by each future
+            logger.error("recognition of %s coalesced images is failed: %s", len(batch), ex)
+            for _, future in batch:
+                future.set_exception(ex)
+            return
+        for (_, future), text in zip(batch, texts):
+            future.set_result(text)
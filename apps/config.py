@@ -1,5 +1,6 @@
 import sys
 from enum import Enum
+from typing import Callable, NamedTuple
 from apps.languages import Languages
 from PyQt5.QtCore import QSettings
 from darkdetect import isDark
@@ -28,6 +29,35 @@ class LogoTheme(Enum):
             return self.name == other.name
 
 
+# formats of extracted text which can be copied
+CLIPBOARD_FORMATS = ("text", "json", "tsv", "hocr")
+
+
+class SettingsSnapshot(NamedTuple):
+    # immutable values of settings at some moment
+    theme: str
+    logo_theme: str
+    is_notification_enabled: bool
+    is_save_photos: bool
+    save_folder: str | None
+    languages: tuple[str, ...]
+    hotkey: str
+    ocr_workers: int
+    is_block_parallel: bool
+    is_disk_cache: bool
+    preprocess_profile: str
+    preprocess_stages: tuple[str, ...]
+    is_script_detection: bool
+    archive_max_size: int
+    archive_max_age: int
+    clipboard_format: str
+    fast_tessdata: str
+    best_tessdata: str
+    retry_confidence: int
+    is_hot_standby: bool
+    history_max_age: int
+
+
 class Settings:
     # Never change
     title = "Text Extractor App"
@@ -44,29 +74,130 @@ class Settings:
         self.save_folder: str | None = None
         self.languages: list[str] | None = None
         self.hotkey: str | None = None
+        self.ocr_workers: int | None = None
+        self.is_block_parallel: bool | None = None
+        self.is_disk_cache: bool | None = None
+        self.preprocess_profile: str | None = None
+        self.preprocess_stages: list[str] | None = None
+        self.is_script_detection: bool | None = None
+        self.archive_max_size: int | None = None
+        self.archive_max_age: int | None = None
+        self.clipboard_format: str | None = None
+        self.fast_tessdata: str | None = None
+        self.best_tessdata: str | None = None
+        self.retry_confidence: int | None = None
+        self.is_hot_standby: bool | None = None
+        self.history_max_age: int | None = None
 
         # support fields
         self.__run_path = "HKEY_CURRENT_USER\\Software\\Microsoft\\Windows\\CurrentVersion\\Run"
+        self.__snapshot: SettingsSnapshot | None = None
+        self.__subscribers: list[Callable[[SettingsSnapshot, set[str]], None]] = []
 
         # update values
         self.__update_values()
 
+    @property
+    def snapshot(self) -> SettingsSnapshot:
+        return self.__snapshot
+
+    def subscribe(self, callback: Callable[[SettingsSnapshot, set[str]], None]):
+        # callback is called with new snapshot and names of changed fields
+        self.__subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[SettingsSnapshot, set[str]], None]):
+        self.__subscribers.remove(callback)
+
+    def apply(self, values: dict) -> set[str]:
+        """
+        Applying values which are already saved by other process (or instance), backend is not used
+        :param values: fields of settings and their new values
+        :return: names of changed fields
+        """
+        previous = self.__snapshot
+        for name, value in values.items():
+            if name not in SettingsSnapshot._fields:
+                raise AttributeError(f"Unknown setting: {name}")
+            setattr(self, name, value)
+        self.__snapshot = self.__make_snapshot()
+        return self.__notify(previous)
+
     def set_values(self, theme: Theme = None,
                    logo_theme: LogoTheme = None,
                    is_notification_enabled: bool = None,
                    is_save_photos: bool = None,
                    save_folder: str | None = None,
                    languages: list[str] = None,
-                   hotkey: str = None):
+                   hotkey: str = None,
+                   ocr_workers: int = None,
+                   is_block_parallel: bool = None,
+                   is_disk_cache: bool = None,
+                   preprocess_profile: str = None,
+                   preprocess_stages: list[str] = None,
+                   is_script_detection: bool = None,
+                   archive_max_size: int = None,
+                   archive_max_age: int = None,
+                   clipboard_format: str = None,
+                   fast_tessdata: str = None,
+                   best_tessdata: str = None,
+                   retry_confidence: int = None,
+                   is_hot_standby: bool = None,
+                   history_max_age: int = None):
+        # nothing to save and reload if values are not changed
+        values = dict(theme=theme, logo_theme=logo_theme, is_notification_enabled=is_notification_enabled,
+                      is_save_photos=is_save_photos, save_folder=save_folder, languages=languages,
+                      hotkey=hotkey, ocr_workers=ocr_workers, is_block_parallel=is_block_parallel,
+                      is_disk_cache=is_disk_cache, preprocess_profile=preprocess_profile,
+                      preprocess_stages=preprocess_stages, is_script_detection=is_script_detection,
+                      archive_max_size=archive_max_size, archive_max_age=archive_max_age,
+                      clipboard_format=clipboard_format, fast_tessdata=fast_tessdata,
+                      best_tessdata=best_tessdata, retry_confidence=retry_confidence,
+                      is_hot_standby=is_hot_standby, history_max_age=history_max_age)
+        if all(value is None or self.__is_same(name, value) for name, value in values.items()):
+            return
+        previous = self.__snapshot
+
         # set new values if values is not one otherwise set previous values
         self.__set_values(theme, logo_theme, is_notification_enabled, is_save_photos,
-                          save_folder, languages, hotkey)
+                          save_folder, languages, hotkey, ocr_workers, is_block_parallel,
+                          is_disk_cache, preprocess_profile, preprocess_stages, is_script_detection,
+                          archive_max_size, archive_max_age, clipboard_format, fast_tessdata, best_tessdata,
+                          retry_confidence, is_hot_standby, history_max_age)
 
         # update fields of class
         self.__update_values()
+        self.__notify(previous)
+
+    def __is_same(self, name: str, value) -> bool:
+        # lists can be changed in place before set_values, so they are compared with snapshot
+        current = getattr(self.__snapshot, name)
+        if isinstance(value, Enum):
+            value = value.value
+        if isinstance(value, list):
+            value = tuple(value)
+        return current == value
+
+    def __make_snapshot(self) -> SettingsSnapshot:
+        values = {name: getattr(self, name) for name in SettingsSnapshot._fields}
+        for name in ("languages", "preprocess_stages"):
+            # backend can return single item of list as string
+            value = values[name] or ()
+            values[name] = (value,) if isinstance(value, str) else tuple(value)
+        return SettingsSnapshot(**values)
+
+    def __notify(self, previous: SettingsSnapshot) -> set[str]:
+        changed = {name for name in SettingsSnapshot._fields
+                   if getattr(previous, name) != getattr(self.__snapshot, name)}
+        if changed:
+            for callback in list(self.__subscribers):
+                callback(self.__snapshot, changed)
+        return changed
 
     def __set_values(self, theme, logo_theme, is_notification_enabled,
-                     is_save_photos, save_folder, languages, hotkey):
+                     is_save_photos, save_folder, languages, hotkey, ocr_workers, is_block_parallel,
+                     is_disk_cache, preprocess_profile, preprocess_stages, is_script_detection,
+                     archive_max_size, archive_max_age, clipboard_format, fast_tessdata, best_tessdata,
+                     retry_confidence, is_hot_standby, history_max_age):
         # set new values if values is not one otherwise set previous values
         self.__settings.setValue(
             "theme", theme.value if theme is not None else self.theme
@@ -90,6 +221,49 @@ class Settings:
         self.__settings.setValue(
             "hotkey", hotkey if hotkey is not None else self.hotkey
         )
+        self.__settings.setValue(
+            "ocr_workers", ocr_workers if ocr_workers is not None else self.ocr_workers
+        )
+        self.__settings.setValue(
+            "block_parallel", is_block_parallel if is_block_parallel is not None else self.is_block_parallel
+        )
+        self.__settings.setValue(
+            "disk_cache", is_disk_cache if is_disk_cache is not None else self.is_disk_cache
+        )
+        self.__settings.setValue(
+            "preprocess_profile", preprocess_profile if preprocess_profile is not None else self.preprocess_profile
+        )
+        self.__settings.setValue(
+            "preprocess_stages", preprocess_stages if preprocess_stages is not None else self.preprocess_stages
+        )
+        self.__settings.setValue(
+            "script_detection",
+            is_script_detection if is_script_detection is not None else self.is_script_detection
+        )
+        self.__settings.setValue(
+            "archive_max_size", archive_max_size if archive_max_size is not None else self.archive_max_size
+        )
+        self.__settings.setValue(
+            "archive_max_age", archive_max_age if archive_max_age is not None else self.archive_max_age
+        )
+        self.__settings.setValue(
+            "clipboard_format", clipboard_format if clipboard_format is not None else self.clipboard_format
+        )
+        self.__settings.setValue(
+            "fast_tessdata", fast_tessdata if fast_tessdata is not None else self.fast_tessdata
+        )
+        self.__settings.setValue(
+            "best_tessdata", best_tessdata if best_tessdata is not None else self.best_tessdata
+        )
+        self.__settings.setValue(
+            "retry_confidence", retry_confidence if retry_confidence is not None else self.retry_confidence
+        )
+        self.__settings.setValue(
+            "hot_standby", is_hot_standby if is_hot_standby is not None else self.is_hot_standby
+        )
+        self.__settings.setValue(
+            "history_max_age", history_max_age if history_max_age is not None else self.history_max_age
+        )
 
     def __update_values(self):
         # update fields
@@ -103,6 +277,28 @@ class Settings:
             Languages.OrientationModule.value
         ])
         self.hotkey: str = self.__settings.value("hotkey", "shift+alt+a")
+        self.ocr_workers: int = self.__settings.value("ocr_workers", 2, int)
+        self.is_block_parallel: bool = self.__settings.value("block_parallel", True, bool)
+        self.is_disk_cache: bool = self.__settings.value("disk_cache", False, bool)
+        self.preprocess_profile: str = self.__settings.value("preprocess_profile", "screen")
+        # stages of "custom" profile
+        self.preprocess_stages: list[str] = self.__settings.value("preprocess_stages", [])
+        self.is_script_detection: bool = self.__settings.value("script_detection", True, bool)
+        # retention of saved screenshots, size in MB and age in days
+        self.archive_max_size: int = self.__settings.value("archive_max_size", 512, int)
+        self.archive_max_age: int = self.__settings.value("archive_max_age", 30, int)
+        # text, json, tsv or hocr
+        self.clipboard_format: str = self.__settings.value("clipboard_format", "text")
+        # folders of tessdata_fast and tessdata_best models, empty is models of installed tesseract
+        #   lines with word confidence below retry_confidence are recognized again by best models
+        self.fast_tessdata: str = self.__settings.value("fast_tessdata", "")
+        self.best_tessdata: str = self.__settings.value("best_tessdata", "")
+        self.retry_confidence: int = self.__settings.value("retry_confidence", 70, int)
+        # warmed up event loop which replaces failed one without cold start, it costs memory of second process
+        self.is_hot_standby: bool = self.__settings.value("hot_standby", True, bool)
+        # retention of history of texts in days, 0 is unlimited
+        self.history_max_age: int = self.__settings.value("history_max_age", 90, int)
+        self.__snapshot = self.__make_snapshot()
 
     def auto_start(self, enable: bool = True):
         autostart = QSettings(self.__run_path, QSettings.NativeFormat)
@@ -122,10 +318,30 @@ class Settings:
         return self.__settings
 
     def clear(self):
+        previous = self.__snapshot
         self.__settings.clear()
         self.__update_values()
+        self.__notify(previous)
 
     def __str__(self):
         return (f"Settings(title={self.title}, theme={self.theme}, logo_theme={self.logo_theme}, "
                 f"is_notification_disabled={self.is_notification_enabled}, is_save_photos={self.is_save_photos}, "
-                f"save_folder={self.save_folder}, languages={self.languages}, hotkey={self.hotkey})")
+                f"save_folder={self.save_folder}, languages={self.languages}, hotkey={self.hotkey}, "
+                f"ocr_workers={self.ocr_workers}, is_block_parallel={self.is_block_parallel}, "
+                f"is_disk_cache={self.is_disk_cache}, preprocess_profile={self.preprocess_profile}, "
+                f"preprocess_stages={self.preprocess_stages}, is_script_detection={self.is_script_detection}, "
+                f"archive_max_size={self.archive_max_size}, archive_max_age={self.archive_max_age}, "
+                f"clipboard_format={self.clipboard_format}, fast_tessdata={self.fast_tessdata}, "
+                f"best_tessdata={self.best_tessdata}, retry_confidence={self.retry_confidence}, "
+                f"is_hot_standby={self.is_hot_standby}, history_max_age={self.history_max_age})")
+
+
+# settings of process, they are read from backend once and shared by all modules
+_shared_settings: Settings | None = None
+
+
+def get_settings() -> Settings:
+    global _shared_settings
+    if _shared_settings is None:
+        _shared_settings = Settings()
+    return _shared_settings
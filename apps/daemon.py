@@ -0,0 +1,430 @@
+# Local OCR daemon
+#   python -m apps.daemon [--port 8765] [--workers N] [--max-pending 64] [--languages eng+rus]
+#   other tools get text from warm engines over HTTP on localhost, instead of starting tesseract for each image
+#
+#   POST /ocr?format=text      body: image bytes (PNG, JPEG, ...) or JSON {"path": "..."}, response is result
+#   POST /batch?format=json    body: JSON {"paths": [...]}, response is JSON {"results": [...]} in order of paths
+#   GET  /health, GET /stats
+#   format is text, json, tsv or hocr, images over limit of pending images are rejected with 503
+#   small images of text requests are coalesced, so concurrent requests of snippets share one OCR call
+#
+#   requests except /health must send "Authorization: Bearer <token>", token is created in file which only
+#   current user can read (see get_daemon_token_path), so other accounts of computer can not read its files.
+#   requests with Host other than loopback or with Origin are rejected, so web pages can not reach it
+#   even by DNS rebinding
+import argparse
+import hmac
+import http.client
+import io
+import json
+import logging
+import os
+import secrets
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
+import PIL.Image
+from apps.coalesce import CoalescingScheduler
+from apps.config import CLIPBOARD_FORMATS as FORMATS
+from apps.config import get_settings
+from apps.metrics import CaptureTimer
+from apps.pipeline import ExtractionPipeline
+from apps.utils import get_daemon_token_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+# body of bigger request is rejected, full screen PNG of 4K monitor is about 10 MB
+MAX_BODY_SIZE = 64 * 1024 * 1024
+# body of /batch is read before its images are counted, it is only JSON of paths
+MAX_JSON_SIZE = 1024 * 1024
+# seconds of waiting for data of client, so idle connections do not keep threads of server
+REQUEST_TIMEOUT = 30
+CONTENT_TYPES = {
+    "text": "text/plain; charset=utf-8",
+    "json": "application/json",
+    "tsv": "text/tab-separated-values; charset=utf-8",
+    "hocr": "application/xhtml+xml; charset=utf-8",
+}
+LOOPBACK_HOSTS = {"127.0.0.1", "localhost", "[::1]"}
+
+
+class DaemonBusy(Exception):
+    pass
+
+
+def read_token(path: str | None = None) -> str:
+    with open(path or get_daemon_token_path(), encoding="utf-8") as file:
+        return file.read().strip()
+
+
+def create_token(path: str | None = None) -> str:
+    """
+    Token of existing file is kept, so running clients do not lose access after restart of daemon
+    :return: token which clients must send
+    """
+    path = path or get_daemon_token_path()
+    try:
+        return read_token(path)
+    except FileNotFoundError:
+        pass
+    token = secrets.token_urlsafe(32)
+    # file is readable only by owner (on Windows home folder of user is not readable by others)
+    descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+        file.write(token)
+    return token
+
+
+class OcrDaemon:
+    def __init__(self, pipeline: ExtractionPipeline, workers: int = 2, max_pending: int = 64,
+                 host: str = "127.0.0.1", port: int = DEFAULT_PORT, coalesce: bool = True,
+                 token: str | None = None):
+        """
+        :param pipeline: pipeline which is shared by all requests
+        :param workers: count of images which are recognized at the same time
+        :param max_pending: count of images which are recognized or wait for worker, others are rejected
+        :param port: 0 is any free port, see address
+        :param coalesce: small images are recognized in composites, see CoalescingScheduler
+        :param token: token of clients, default is token of file of current user, it is created when daemon
+            is started, see create_token
+        """
+        self.pipeline = pipeline
+        self.workers = workers
+        self.max_pending = max_pending
+        self.token = token
+        self.__is_warmed_up = False
+        # composites are recognized by the same workers, so not more than workers engines are used
+        self.__executor = ThreadPoolExecutor(workers, thread_name_prefix="ocr-daemon")
+        self.__coalescer = CoalescingScheduler(pipeline, executor=self.__executor) if coalesce else None
+        self.__slots = threading.BoundedSemaphore(max_pending)
+        self.__server = ThreadingHTTPServer((host, port), _Handler)
+        self.__server.daemon_threads = True
+        self.__server.ocr_daemon = self
+        self.__thread: threading.Thread | None = None
+
+        # stats
+        self.__stats_lock = threading.Lock()
+        self.requests = 0
+        self.images = 0
+        # images which are recognized alone, mean time of recognition is measured for them
+        self.extracted = 0
+        self.rejected = 0
+        self.errors = 0
+        self.ocr_ms = 0.0
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self.__server.server_address[:2]
+
+    def warm_up(self):
+        # models are loaded for each worker before first request
+        start = time.perf_counter()
+        self.pipeline.warm_up(self.workers)
+        self.__is_warmed_up = True
+        logger.info("engines are warmed up in %.0fms", (time.perf_counter() - start) * 1000)
+
+    def serve_forever(self):
+        if self.token is None:
+            self.token = create_token()
+        if not self.__is_warmed_up:
+            self.warm_up()
+        logger.info("ocr daemon listens on %s:%s", *self.address)
+        self.__server.serve_forever()
+
+    def start(self):
+        # serving in background thread, e.g. for load test in one process
+        if self.token is None:
+            # token is ready when start returns, so clients can read it
+            self.token = create_token()
+        self.__thread = threading.Thread(target=self.serve_forever, name="ocr-daemon-server", daemon=True)
+        self.__thread.start()
+
+    def close(self):
+        if self.__thread is not None:
+            self.__server.shutdown()
+            self.__thread.join()
+            self.__thread = None
+        self.__server.server_close()
+        # coalescer submits composites to executor, so it is closed first
+        if self.__coalescer is not None:
+            self.__coalescer.close()
+        self.__executor.shutdown(wait=True)
+        self.pipeline.close()
+
+    @contextmanager
+    def reserve(self, count: int):
+        """
+        Reserving slots of pending images, e.g. before body of request is read, so rejected request is not read
+        :raise DaemonBusy: if there are no free slots, no slot is reserved then
+        """
+        acquired = 0
+        try:
+            # request is accepted only completely, so batch does not wait for slots which are taken by others
+            for _ in range(count):
+                if not self.__slots.acquire(blocking=False):
+                    with self.__stats_lock:
+                        self.rejected += count
+                    raise DaemonBusy(f"more than {self.max_pending} images are pending")
+                acquired += 1
+            yield
+        finally:
+            for _ in range(acquired):
+                self.__slots.release()
+
+    def recognize(self, images: list, output_format: str = "text", is_reserved: bool = False) -> list[str]:
+        """
+        Recognizing images by workers, images of one request are recognized in parallel
+        :param images: arrays, paths or file objects of encoded images,
+            files are opened after slots are reserved, so rejected request does not decode them
+        :param is_reserved: slots of images are already reserved by caller, see reserve
+        :return: results in requested format in order of images
+        """
+        if output_format not in FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}")
+        if not isinstance(images, list):
+            raise TypeError(f"expected list of images, got {type(images).__name__}")
+        if not is_reserved:
+            with self.reserve(len(images)):
+                return self.recognize(images, output_format, is_reserved=True)
+        images = [image if isinstance(image, np.ndarray) else _open_image(image) for image in images]
+        futures = [
+            self.__coalescer.submit(image)
+            if self.__coalescer is not None and output_format == "text" and self.__coalescer.is_small(image)
+            else self.__executor.submit(self.__extract, image, output_format)
+            for image in images
+        ]
+        results = [future.result() for future in futures]
+        with self.__stats_lock:
+            self.images += len(images)
+        return results
+
+    def count_request(self, error: bool = False):
+        with self.__stats_lock:
+            self.requests += 1
+            self.errors += error
+
+    def stats(self) -> dict:
+        with self.__stats_lock:
+            return {"requests": self.requests, "images": self.images, "rejected": self.rejected,
+                    "errors": self.errors, "workers": self.workers, "max_pending": self.max_pending,
+                    "mean_ocr_ms": round(self.ocr_ms / self.extracted, 1) if self.extracted else None,
+                    "coalesced": self.__coalescer.stats() if self.__coalescer is not None else None}
+
+    def __extract(self, image: np.ndarray, output_format: str) -> str:
+        timer = CaptureTimer()
+        if output_format == "text":
+            result = self.pipeline.run(image, timer)
+        else:
+            result = self.pipeline.run_words(image, timer).format(output_format)
+        with self.__stats_lock:
+            self.extracted += 1
+            self.ocr_ms += timer.total()
+        return result
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "TextExtractorOCR/1.0"
+    timeout = REQUEST_TIMEOUT
+
+    @property
+    def ocr_daemon(self) -> OcrDaemon:
+        return self.server.ocr_daemon
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if not self.__is_allowed(path):
+            return
+        if path == "/health":
+            self.__send(200, "ok\n", CONTENT_TYPES["text"])
+        elif path == "/stats":
+            self.__send(200, json.dumps(self.ocr_daemon.stats()), CONTENT_TYPES["json"])
+        else:
+            self.__send(404, "not found\n", CONTENT_TYPES["text"])
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        output_format = parse_qs(url.query).get("format", ["text"])[0]
+        try:
+            if not self.__is_allowed(url.path):
+                return
+            if url.path not in ("/ocr", "/batch"):
+                self.__send(404, "not found\n", CONTENT_TYPES["text"])
+                return
+            if output_format not in FORMATS:
+                raise ValueError(f"Unknown output format: {output_format}, expected one of {', '.join(FORMATS)}")
+            if url.path == "/ocr":
+                # slot is reserved before body is read, so memory of bodies is limited by max_pending
+                with self.ocr_daemon.reserve(1):
+                    image = _read_image(self.__read_body(MAX_BODY_SIZE))
+                    result = self.ocr_daemon.recognize([image], output_format, is_reserved=True)[0]
+                self.__send(200, result, CONTENT_TYPES[output_format])
+            else:
+                results = self.ocr_daemon.recognize(_read_paths(self.__read_body(MAX_JSON_SIZE)), output_format)
+                self.__send(200, json.dumps({"results": results}, ensure_ascii=False), CONTENT_TYPES["json"])
+            self.ocr_daemon.count_request()
+        except DaemonBusy as ex:
+            self.ocr_daemon.count_request(error=True)
+            self.__send(503, f"{ex}\n", CONTENT_TYPES["text"], {"Retry-After": "1"})
+        except (ValueError, KeyError, TypeError) as ex:  # bad request, e.g. not image or wrong path
+            self.ocr_daemon.count_request(error=True)
+            self.__send(400, f"{type(ex).__name__}: {ex}\n", CONTENT_TYPES["text"])
+        except Exception as ex:  # e.g. tesseract is failed
+            logger.error("ocr request is failed: %s", ex)
+            self.ocr_daemon.count_request(error=True)
+            self.__send(500, f"{type(ex).__name__}: {ex}\n", CONTENT_TYPES["text"])
+
+    def log_message(self, format, *args):
+        logger.debug("%s " + format, self.address_string(), *args)
+
+    def __is_allowed(self, path: str) -> bool:
+        # response is sent if request is rejected
+        if _host_name(self.headers.get("Host") or "") not in LOOPBACK_HOSTS or self.headers.get("Origin") is not None:
+            self.__send(403, "forbidden\n", CONTENT_TYPES["text"])
+            return False
+        if path == "/health":
+            return True
+        authorization = self.headers.get("Authorization") or ""
+        if not hmac.compare_digest(authorization.encode(), f"Bearer {self.ocr_daemon.token}".encode()):
+            self.__send(401, "token is missing or wrong\n", CONTENT_TYPES["text"], {"WWW-Authenticate": "Bearer"})
+            return False
+        return True
+
+    def __read_body(self, max_size: int) -> bytes:
+        size = int(self.headers.get("Content-Length") or 0)
+        if size < 0:
+            raise ValueError("Content-Length is negative")
+        if size > max_size:
+            raise ValueError(f"body is bigger than {max_size} bytes")
+        return self.rfile.read(size)
+
+    def __send(self, status: int, body: str, content_type: str, headers: dict | None = None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _host_name(host: str) -> str:
+    # Host header without port, IPv6 address keeps its brackets
+    host = host.lower()
+    if host.startswith("["):
+        return host[:host.find("]") + 1]
+    return host.split(":", 1)[0]
+
+
+def _open_image(file) -> np.ndarray:
+    # path or file object of encoded image
+    try:
+        with PIL.Image.open(file) as image:
+            return np.asarray(image.convert("RGB"))
+    except (OSError, PIL.Image.DecompressionBombError) as ex:
+        # not image, file is not found or too many pixels, other OSError is error of tesseract
+        raise ValueError(f"image is not opened: {ex}") from ex
+
+
+def _read_image(body: bytes) -> str | io.BytesIO:
+    # encoded image or JSON with path of image, it is opened by OcrDaemon.recognize
+    if body[:1] == b"{":
+        path = json.loads(body)["path"]
+        if not isinstance(path, str):
+            raise TypeError(f"path must be string, got {type(path).__name__}")
+        return path
+    return io.BytesIO(body)
+
+
+def _read_paths(body: bytes) -> list[str]:
+    # JSON with paths of images of /batch
+    paths = json.loads(body)["paths"]
+    if not isinstance(paths, list) or not all(isinstance(path, str) for path in paths):
+        raise TypeError("paths must be list of strings")
+    return paths
+
+
+class DaemonClient:
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, timeout: float = 60.0,
+                 token: str | None = None):
+        """
+        :param token: token of daemon, default is token of file of current user
+        """
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.token = token
+
+    def ocr(self, image: bytes | str, output_format: str = "text") -> str:
+        """
+        :param image: encoded image or path of image file
+        :return: result in requested format
+        """
+        body = json.dumps({"path": os.path.abspath(image)}).encode() if isinstance(image, str) else image
+        return self.__request("POST", f"/ocr?format={output_format}", body)
+
+    def batch(self, paths: list[str], output_format: str = "text") -> list[str]:
+        body = json.dumps({"paths": [os.path.abspath(path) for path in paths]}).encode()
+        return json.loads(self.__request("POST", f"/batch?format={output_format}", body))["results"]
+
+    def stats(self) -> dict:
+        return json.loads(self.__request("GET", "/stats"))
+
+    def is_alive(self) -> bool:
+        try:
+            return self.__request("GET", "/health") == "ok\n"
+        except (OSError, RuntimeError):
+            return False
+
+    def __request(self, method: str, path: str, body: bytes | None = None) -> str:
+        if self.token is None:
+            # file is read when it is needed, so client can be created before daemon is started
+            self.token = read_token()
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            connection.request(method, path, body, {"Authorization": f"Bearer {self.token}"})
+            response = connection.getresponse()
+            data = response.read().decode("utf-8")
+        finally:
+            connection.close()
+        if response.status != 200:
+            raise RuntimeError(f"ocr daemon returned {response.status}: {data.strip()}")
+        return data
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m apps.daemon", description="Serve OCR on localhost")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port (default: {DEFAULT_PORT})")
+    parser.add_argument("--workers", type=int, default=None, help="count of parallel recognitions "
+                                                                  "(default: OCR workers from settings)")
+    parser.add_argument("--max-pending", type=int, default=64, help="pending images before requests are rejected")
+    parser.add_argument("--languages", default=None, help="e.g. eng+rus (default: languages from settings)")
+    parser.add_argument("--no-coalesce", action="store_true", help="recognize each small image separately")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    settings = get_settings().snapshot
+    workers = args.workers or settings.ocr_workers
+    # images are not split into blocks if requests are already recognized in parallel
+    settings = settings._replace(is_block_parallel=settings.is_block_parallel and workers == 1)
+    if args.languages:
+        settings = settings._replace(languages=tuple(args.languages.split("+")))
+    daemon = OcrDaemon(ExtractionPipeline.from_settings(settings), workers, args.max_pending, port=args.port,
+                       coalesce=not args.no_coalesce)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+# OCR engines
+#   WarmEngine keeps tesseract and its language models loaded in-process (tesserocr),
+#   CliEngine spawns the tesseract binary per call (pytesseract) and is used as fallback
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+import numpy as np
+import PIL.Image
+import pytesseract
+from apps.words import WordBoxes
+
+try:
+    import tesserocr
+except ImportError:  # optional dependency, CLI engine is used instead
+    tesserocr = None
+
+
+class OcrEngine:
+    name = "base"
+
+    def __init__(self, languages: str, tessdata: str | None = None):
+        # languages in tesseract format, e.g. eng+rus+ukr
+        self.languages = languages
+        # folder of models, e.g. of tessdata_best, folder of installed tesseract is used if None
+        self.tessdata = tessdata
+
+    @property
+    def key(self) -> tuple[str, str | None]:
+        # engines with the same key load the same models
+        return self.languages, self.tessdata
+
+    def image_to_string(self, image: np.ndarray | PIL.Image.Image) -> str:
+        raise NotImplementedError
+
+    def image_to_data(self, image: np.ndarray | PIL.Image.Image) -> WordBoxes:
+        # words with boxes and confidences
+        raise NotImplementedError
+
+    def detect_script(self, image: np.ndarray | PIL.Image.Image) -> tuple[str, float] | None:
+        """
+        Detecting script of text, engine must be created for "osd" language
+        :return: (script name, confidence) or None if script can not be detected (e.g. too few characters)
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __str__(self):
+        return f"{self.__class__.__name__}(languages={self.languages}, tessdata={self.tessdata})"
+
+
+class CliEngine(OcrEngine):
+    name = "cli"
+
+    def __init__(self, languages: str, tessdata: str | None = None):
+        super().__init__(languages, tessdata)
+        self.__config = f'--tessdata-dir "{tessdata}"' if tessdata else ""
+
+    def image_to_string(self, image: np.ndarray | PIL.Image.Image) -> str:
+        return pytesseract.image_to_string(image, self.languages, self.__config)
+
+    def image_to_data(self, image: np.ndarray | PIL.Image.Image) -> WordBoxes:
+        return WordBoxes.from_tsv(pytesseract.image_to_data(image, self.languages, self.__config))
+
+    def detect_script(self, image: np.ndarray | PIL.Image.Image) -> tuple[str, float] | None:
+        try:
+            osd = pytesseract.image_to_osd(image, self.languages, self.__config,
+                                           output_type=pytesseract.Output.DICT)
+        except pytesseract.TesseractError:
+            return None
+        return osd["script"], float(osd["script_conf"])
+
+
+class WarmEngine(OcrEngine):
+    name = "warm"
+
+    def __init__(self, languages: str, tessdata: str | None = None):
+        super().__init__(languages, tessdata)
+        if tesserocr is None:
+            raise RuntimeError("tesserocr is not installed")
+        # models are loaded once here and reused for every image
+        if tessdata:
+            self.__api = tesserocr.PyTessBaseAPI(path=tessdata, lang=languages)
+        else:
+            self.__api = tesserocr.PyTessBaseAPI(lang=languages)
+
+    def image_to_string(self, image: np.ndarray | PIL.Image.Image) -> str:
+        self.__set_image(image)
+        return self.__api.GetUTF8Text()
+
+    def image_to_data(self, image: np.ndarray | PIL.Image.Image) -> WordBoxes:
+        self.__set_image(image)
+        return WordBoxes.from_tsv(self.__api.GetTSVText(0))
+
+    def detect_script(self, image: np.ndarray | PIL.Image.Image) -> tuple[str, float] | None:
+        self.__set_image(image)
+        try:
+            osd = self.__api.DetectOrientationScript()
+        except RuntimeError:
+            return None
+        if not osd or not osd.get("script_name"):
+            return None
+        return osd["script_name"], float(osd["script_conf"])
+
+    def __set_image(self, image):
+        if isinstance(image, PIL.Image.Image):
+            self.__api.SetImage(image)
+            return
+        image = np.ascontiguousarray(image)
+        height, width = image.shape[:2]
+        bytes_per_pixel = 1 if image.ndim == 2 else image.shape[2]
+        self.__api.SetImageBytes(image.tobytes(), width, height, bytes_per_pixel, width * bytes_per_pixel)
+
+    def close(self):
+        self.__api.End()
+
+
+def create_engine(languages: str, warm: bool = True, tessdata: str | None = None) -> OcrEngine:
+    if warm and tesserocr is not None:
+        try:
+            return WarmEngine(languages, tessdata)
+        except RuntimeError:  # e.g. language data can not be loaded by libtesseract
+            pass
+    return CliEngine(languages, tessdata)
+
+
+class EnginePool:
+    """
+    Keeps idle warm engines of recently used language sets (and folders of models).
+    An engine is not thread safe, so it is used by one thread at a time
+    """
+
+    def __init__(self, warm: bool = True, max_sets: int = 4):
+        self.warm = warm
+        # count of language sets which models are kept in memory
+        self.max_sets = max_sets
+        self.__idle: OrderedDict[tuple[str, str | None], list[OcrEngine]] = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def acquire(self, languages: str, tessdata: str | None = None) -> OcrEngine:
+        key = languages, tessdata
+        with self.__lock:
+            idle = self.__idle.setdefault(key, [])
+            self.__idle.move_to_end(key)
+            # models of the least recently used sets are not needed anymore
+            while len(self.__idle) > self.max_sets:
+                _, engines_of_set = self.__idle.popitem(last=False)
+                for engine in engines_of_set:
+                    engine.close()
+            if idle:
+                return idle.pop()
+        return create_engine(languages, self.warm, tessdata)
+
+    def release(self, engine: OcrEngine):
+        with self.__lock:
+            if engine.key in self.__idle:
+                self.__idle[engine.key].append(engine)
+                return
+        engine.close()
+
+    @contextmanager
+    def engine(self, languages: str, tessdata: str | None = None):
+        engine = self.acquire(languages, tessdata)
+        try:
+            yield engine
+        finally:
+            self.release(engine)
+
+    def warm_up(self, languages: str, count: int = 1, tessdata: str | None = None):
+        # load models before first capture
+        engines = [self.acquire(languages, tessdata) for _ in range(count)]
+        for engine in engines:
+            self.release(engine)
+
+    def close(self):
+        with self.__lock:
+            for engines_of_set in self.__idle.values():
+                for engine in engines_of_set:
+                    engine.close()
+            self.__idle.clear()
+
+
+# process wide pool
+engines = EnginePool()
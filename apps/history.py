@@ -0,0 +1,102 @@
+# History of extracted texts
+#   results are written by event loop process and searched by tray, SQLite in WAL mode lets both use the file
+#   text is indexed by FTS5, so search is fast across tens of thousands of captures
+import json
+import re
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    text TEXT NOT NULL,
+    region TEXT,
+    languages TEXT,
+    image_key TEXT
+);
+CREATE INDEX IF NOT EXISTS captures_time ON captures(time);
+CREATE VIRTUAL TABLE IF NOT EXISTS captures_fts USING fts5(text, content='captures', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS captures_insert AFTER INSERT ON captures BEGIN
+    INSERT INTO captures_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS captures_delete AFTER DELETE ON captures BEGIN
+    INSERT INTO captures_fts(captures_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+class HistoryRecord:
+    def __init__(self, id: int, time: float, text: str, region: tuple[int, int, int, int] | None,
+                 languages: str | None, image_key: str | None):
+        self.id = id
+        self.time = time
+        self.text = text
+        # (left, top, width, height) in physical pixels of screen
+        self.region = region
+        self.languages = languages
+        # key of image in archive of screenshots
+        self.image_key = image_key
+
+    def __str__(self):
+        return f"HistoryRecord(id={self.id}, time={self.time}, languages={self.languages}, text={self.text[:30]!r})"
+
+
+class History:
+    def __init__(self, path: str):
+        self.path = path
+        self.__lock = threading.Lock()
+        # results are added by worker threads, connection is guarded by lock
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        self.__connection.executescript(SCHEMA)
+
+    def add(self, text: str, languages: str | None = None, region: tuple[int, int, int, int] | None = None,
+            image_key: str | None = None, captured_at: float | None = None) -> int:
+        with self.__lock, self.__connection:
+            cursor = self.__connection.execute(
+                "INSERT INTO captures (time, text, region, languages, image_key) VALUES (?, ?, ?, ?, ?)",
+                (captured_at or time.time(), text, json.dumps(region) if region else None, languages, image_key)
+            )
+            return cursor.lastrowid
+
+    def search(self, query: str, limit: int = 50) -> list[HistoryRecord]:
+        """
+        Searching captures which contain all words of query, words are matched by prefix
+        :return: records from the latest, the latest captures are returned for empty query
+        """
+        words = re.findall(r"\w+", query)
+        with self.__lock:
+            if not words:
+                rows = self.__connection.execute(
+                    "SELECT id, time, text, region, languages, image_key FROM captures "
+                    "ORDER BY time DESC LIMIT ?", (limit,)
+                ).fetchall()
+            else:
+                # every word is quoted, so symbols of FTS syntax in query are not interpreted
+                match = " ".join(f'"{word}"*' for word in words)
+                rows = self.__connection.execute(
+                    "SELECT c.id, c.time, c.text, c.region, c.languages, c.image_key "
+                    "FROM captures_fts JOIN captures c ON c.id = captures_fts.rowid "
+                    "WHERE captures_fts MATCH ? ORDER BY c.time DESC LIMIT ?", (match, limit)
+                ).fetchall()
+        return [HistoryRecord(id, time_, text, tuple(json.loads(region)) if region else None, languages, image_key)
+                for id, time_, text, region, languages, image_key in rows]
+
+    def count(self) -> int:
+        with self.__lock:
+            return self.__connection.execute("SELECT count(*) FROM captures").fetchone()[0]
+
+    def delete_older(self, timestamp: float) -> int:
+        with self.__lock, self.__connection:
+            return self.__connection.execute("DELETE FROM captures WHERE time < ?", (timestamp,)).rowcount
+
+    def clear(self):
+        with self.__lock, self.__connection:
+            self.__connection.execute("DELETE FROM captures")
+
+    def close(self):
+        with self.__lock:
+            self.__connection.close()
@@ -0,0 +1,120 @@
+# Hotkey listener process
+#   the only always-resident part of capture, it imports keyboard and nothing else (no Qt, NumPy, OCR engines),
+#   so it stays small for a whole workday. presses are passed by tray to event loop process with overlay and OCR,
+#   so event loop can be replaced (e.g. recycled when its memory grows) without losing hotkey.
+#   process is spawned, not forked, so it does not inherit memory of tray
+import threading
+import time
+from multiprocessing import get_context
+from multiprocessing.connection import Connection
+
+
+def is_hook_alive() -> bool | None:
+    """
+    Threads of keyboard hook can die, e.g. after sleep, then hotkey does nothing
+    :return: None if it can not be checked, threads are private attributes of keyboard and can be changed
+    """
+    import keyboard
+    listener = getattr(keyboard, "_listener", None)
+    threads = [getattr(listener, name, None) for name in ("listening_thread", "processing_thread")]
+    threads = [thread for thread in threads if thread is not None]
+    if not threads or not all(callable(getattr(thread, "is_alive", None)) for thread in threads):
+        return None
+    return all(thread.is_alive() for thread in threads)
+
+
+def _listen(hotkey: str, control_receiver: Connection, events_sender: Connection, interval: float):
+    import keyboard
+    lock = threading.Lock()
+
+    def send(message: tuple) -> bool:
+        # hotkey is pressed in thread of keyboard, heartbeat is sent by this thread
+        with lock:
+            try:
+                events_sender.send(message)
+            except OSError:  # tray process is closed
+                return False
+        return True
+
+    def on_hotkey():
+        # perf_counter is system wide clock on Windows and Linux, so latency of overlay is measured from press
+        send(("pressed", time.perf_counter()))
+
+    handle = keyboard.add_hotkey(hotkey, on_hotkey)
+    while True:
+        try:
+            if control_receiver.poll(interval):
+                kind, payload = control_receiver.recv()
+                if kind == "hotkey":
+                    keyboard.remove_hotkey(handle)
+                    handle = keyboard.add_hotkey(payload, on_hotkey)
+        except (EOFError, OSError):  # tray process is closed
+            return
+        if not send(("beat", is_hook_alive())):
+            return
+
+
+class HotkeyListener:
+    # listener process as it is seen from tray process
+    def __init__(self, hotkey: str, on_pressed, interval: float = 1.0):
+        """
+        :param on_pressed: called with time.perf_counter() of press, in reader thread, not in Qt thread
+        :param interval: seconds between heartbeats
+        """
+        context = get_context("spawn")
+        control_receiver, self.__control_sender = context.Pipe(duplex=False)
+        events_receiver, events_sender = context.Pipe(duplex=False)
+        self.process = context.Process(target=_listen, args=(hotkey, control_receiver, events_sender, interval),
+                                       name="hotkey-listener", daemon=True)
+        self.process.start()
+        # ends of pipes are used only by listener process
+        control_receiver.close()
+        events_sender.close()
+        self.started_at = time.monotonic()
+        # time.monotonic() of last heartbeat, None until hotkey is registered
+        self.last_beat: float | None = None
+        # None if hook can not be checked
+        self.is_hook_alive: bool | None = True
+        self.__events_receiver = events_receiver
+        self.__on_pressed = on_pressed
+        # presses are read by thread, so they do not wait for timer of tray
+        self.__thread = threading.Thread(target=self.__read, name="hotkey-reader", daemon=True)
+        self.__thread.start()
+
+    @property
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def set_hotkey(self, hotkey: str) -> bool:
+        # False if listener is dead
+        try:
+            self.__control_sender.send(("hotkey", hotkey))
+        except OSError:
+            return False
+        return True
+
+    def stop(self, timeout: float | None = None):
+        """
+        :param timeout: seconds to wait for exit, then hung process is killed; not waiting if None
+        """
+        self.process.terminate()
+        self.__control_sender.close()
+        if timeout is not None:
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.kill()
+
+    def __read(self):
+        while True:
+            try:
+                kind, payload = self.__events_receiver.recv()
+            except (EOFError, OSError):  # process is dead, it is seen by is_alive
+                return
+            if kind == "pressed":
+                self.__on_pressed(payload)
+            else:
+                self.last_beat = time.monotonic()
+                self.is_hook_alive = payload
+
+    def __str__(self):
+        return f"HotkeyListener(pid={self.process.pid}, hook={self.is_hook_alive})"
@@ -133,3 +133,56 @@ class Languages(Enum):
             return cls.__members__[name]
         except KeyError:
             return None
+
+
+# languages of non latin scripts by script names of tesseract OSD, other languages are latin
+SCRIPTS: dict[str, tuple[str, ...]] = {
+    "Cyrillic": ("aze_cyrl", "bel", "bul", "kaz", "kir", "mkd", "mon", "rus", "srp", "tat", "tgk", "ukr", "uzb_cyrl"),
+    "Arabic": ("ara", "fas", "pus", "snd", "uig", "urd"),
+    "Greek": ("ell", "grc"),
+    "Hebrew": ("heb", "yid"),
+    "Devanagari": ("hin", "mar", "nep", "san"),
+    "Bengali": ("asm", "ben"),
+    "Han": ("chi_sim", "chi_sim_vert", "chi_tra", "chi_tra_vert", "jpn", "jpn_vert"),
+    "Japanese": ("jpn", "jpn_vert"),
+    "Hangul": ("kor",),
+    "Korean": ("kor",),
+    "Thai": ("tha",),
+    "Lao": ("lao",),
+    "Khmer": ("khm",),
+    "Myanmar": ("mya",),
+    "Tibetan": ("bod", "dzo"),
+    "Georgian": ("kat", "kat_old"),
+    "Armenian": ("hye",),
+    "Ethiopic": ("amh", "tir"),
+    "Gujarati": ("guj",),
+    "Gurmukhi": ("pan",),
+    "Kannada": ("kan",),
+    "Malayalam": ("mal",),
+    "Oriya": ("ori",),
+    "Sinhala": ("sin",),
+    "Tamil": ("tam",),
+    "Telugu": ("tel",),
+    "Syriac": ("syr",),
+    "Thaana": ("div",),
+    "Cherokee": ("chr",),
+    "Canadian_Aboriginal": ("iku",),
+    "Fraktur": ("frk", "deu"),
+}
+LATIN = "Latin"
+# modules which are not languages of any script
+MODULES = (Languages.OrientationModule.value, Languages.MathModule.value)
+
+
+def get_scripts(language: str) -> set[str]:
+    if language in MODULES:
+        return set()
+    scripts = {script for script, languages in SCRIPTS.items() if language in languages}
+    if not scripts or language in SCRIPTS["Fraktur"]:
+        scripts.add(LATIN)
+    return scripts
+
+
+def get_languages_of_script(script: str, languages: list[str]) -> list[str]:
+    # languages of selected which are written with script, modules are never needed for recognition
+    return [language for language in languages if script in get_scripts(language)]
@@ -0,0 +1,76 @@
+# Memory of long running event loop process
+#   captures allocate big short lived buffers (screen pixels, preprocessed images) in several threads,
+#   C heap keeps freed pages and creates arena for each thread, so RSS grows even if nothing leaks.
+#   arenas are limited once and free pages are returned to system when workers are idle
+import ctypes
+import ctypes.util
+import gc
+import logging
+import os
+import sys
+
+logger = logging.getLogger(__name__)
+
+# mallopt parameter of glibc
+_M_ARENA_MAX = -8
+
+
+def _load_libc():
+    # glibc only, other platforms return memory of freed buffers by their heap
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+        libc.malloc_trim, libc.mallopt
+    except (OSError, AttributeError):  # e.g. musl
+        return None
+    return libc
+
+
+_libc = _load_libc()
+
+
+def limit_arenas(count: int = 2):
+    # must be called before threads of workers are started
+    if _libc is not None:
+        _libc.mallopt(_M_ARENA_MAX, count)
+
+
+def release_memory(collect: bool = False):
+    """
+    Returning free pages of heap to system
+    :param collect: collect reference cycles before, e.g. after settings are changed
+    """
+    if collect:
+        gc.collect()
+    if _libc is not None:
+        _libc.malloc_trim(0)
+
+
+def rss_bytes() -> int | None:
+    # resident memory of current process, None if it is not known on platform
+    if sys.platform.startswith("linux"):
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    if sys.platform.startswith("win"):
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+        return None
+    try:
+        import resource
+    except ImportError:
+        return None
+    # peak, not current, on other systems; bytes on macOS, kilobytes on BSD
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
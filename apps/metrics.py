@@ -0,0 +1,143 @@
+# Timing of capture pipeline stages
+#   CaptureTimer collects spans of one capture, MetricsLog keeps last captures in local JSONL file
+#   which is written by event loop process and read by tray
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# upper bounds of histogram buckets in ms, last bucket is open
+BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# file of startup marks, it is set by benchmarks/startup.py and inherited by event loop process
+STARTUP_LOG_ENV = "TEXT_EXTRACTOR_STARTUP_LOG"
+
+
+def mark_startup(stage: str):
+    # record wall time of startup stage, nothing is done in normal run
+    path = os.environ.get(STARTUP_LOG_ENV)
+    if not path:
+        return
+    with open(path, "a", encoding="utf-8") as file:
+        file.write(json.dumps({"stage": stage, "time": time.time(), "pid": os.getpid()}) + "\n")
+
+
+class CaptureTimer:
+    def __init__(self):
+        self.started_at = time.time()
+        # stage name -> ms, in order of stages
+        self.spans: dict[str, float] = {}
+
+    @contextmanager
+    def span(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000)
+
+    def add(self, name: str, ms: float):
+        self.spans[name] = self.spans.get(name, 0.0) + ms
+
+    def total(self) -> float:
+        return sum(self.spans.values())
+
+    def to_record(self) -> dict:
+        return {"time": round(self.started_at, 3), "spans": {name: round(ms, 2) for name, ms in self.spans.items()}}
+
+
+class MetricsLog:
+    def __init__(self, path: str, keep: int = 500):
+        """
+        :param path: JSONL file of records
+        :param keep: count of last captures which are kept
+        """
+        self.path = path
+        self.keep = keep
+        self.__lock = threading.Lock()
+        self.__lines: int | None = None
+
+    def __getstate__(self):
+        # log is passed to event loop process, lock can not be pickled
+        state = self.__dict__.copy()
+        del state["_MetricsLog__lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__lock = threading.Lock()
+
+    def append(self, record: dict):
+        with self.__lock:
+            if self.__lines is None:
+                self.__lines = len(self.__read_lines())
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(record) + "\n")
+            self.__lines += 1
+            # file is compacted rarely, so append stays cheap
+            if self.__lines > self.keep * 2:
+                self.__compact()
+
+    def read(self) -> list[dict]:
+        records = []
+        for line in self.__read_lines()[-self.keep:]:
+            try:
+                records.append(json.loads(line))
+            except ValueError:  # line is being written
+                pass
+        return records
+
+    def summary(self) -> dict[str, dict]:
+        """
+        Getting statistics of stages of last captures
+        :return: stage -> {count, p50, p95, max, histogram}
+        """
+        # numpy is not needed by tray until menu of latency is opened
+        import numpy as np
+        stages: dict[str, list[float]] = {}
+        for record in self.read():
+            spans = record["spans"]
+            for name, ms in spans.items():
+                stages.setdefault(name, []).append(ms)
+            stages.setdefault("total", []).append(sum(spans.values()))
+        summary = {}
+        for name, values in stages.items():
+            values = np.array(values)
+            summary[name] = {
+                "count": len(values),
+                "p50": float(np.percentile(values, 50)),
+                "p95": float(np.percentile(values, 95)),
+                "max": float(values.max()),
+                "histogram": np.bincount(np.searchsorted(BUCKETS, values), minlength=len(BUCKETS) + 1).tolist(),
+            }
+        return summary
+
+    def format_summary(self) -> list[str]:
+        summary = self.summary()
+        if not summary:
+            return ["No captures yet"]
+        return [f"{name}: p50 {values['p50']:.0f} ms, p95 {values['p95']:.0f} ms, max {values['max']:.0f} ms"
+                for name, values in summary.items()]
+
+    def clear(self):
+        with self.__lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.__lines = 0
+
+    def __read_lines(self) -> list[str]:
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                return file.readlines()
+        except FileNotFoundError:
+            return []
+
+    def __compact(self):
+        lines = self.__read_lines()[-self.keep:]
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.writelines(lines)
+        os.replace(temp_path, self.path)
+        self.__lines = len(lines)
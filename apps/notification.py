@@ -1,13 +1,13 @@
 from PyQt5.QtWidgets import QApplication, QErrorMessage
 from winotify import Notification, audio
-from apps.config import Settings
+from apps.config import get_settings
 from apps.utils import get_logo
 from sys import platform
 
 
 class ScreenShotNotification:
     # get settings
-    __settings = Settings()
+    __settings = get_settings()
 
     def __init__(self):
         self.notification = None
@@ -32,9 +32,15 @@ class ScreenShotNotification:
 
 
 def show_wrong_msg(ex: Exception):
-    app = QApplication([])
+    # application can be already created, e.g. in event loop process
+    app = QApplication.instance()
+    is_running = app is not None
+    if not is_running:
+        app = QApplication([])
 
     error_dialog = QErrorMessage()
     error_dialog.showMessage(f'Error: {ex}')
 
+    if is_running:
+        return error_dialog.exec_()
     return app.exec_()
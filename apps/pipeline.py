@@ -0,0 +1,228 @@
+# Extraction pipeline: image -> text
+#   is used by event loop workers and can be used without GUI
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import numpy as np
+from apps.blocks import split_blocks
+from apps.cache import OcrCache
+from apps.config import Settings, SettingsSnapshot
+from apps.engine import engines
+from apps.languages import get_languages_of_script, get_scripts
+from apps.metrics import CaptureTimer
+from apps.preprocess import Preprocessor, grayscale
+from apps.utils import get_cache_folder
+from apps.words import WordBoxes
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionPipeline:
+    # captures with more pixels are recognized by blocks in parallel
+    min_parallel_area = 1200 * 900
+    # script detected with lower confidence is ignored and all selected languages are used,
+    #   script_conf of tesseract is not a probability, values of few units are common for short or mixed text,
+    #   so languages are reduced only if detection is clear; wrong reduction costs more than full set
+    min_script_confidence = 10.0
+
+    def __init__(self, languages: str, block_parallel: bool = True, max_blocks: int | None = None,
+                 cache: OcrCache | None = None, preprocessor: Preprocessor | None = None,
+                 script_detection: bool = True, fast_tessdata: str | None = None, best_tessdata: str | None = None,
+                 retry_confidence: float = 70.0):
+        """
+        :param fast_tessdata: folder of models of first pass, models of installed tesseract are used if None
+        :param best_tessdata: folder of accurate models, lines with low confidence are recognized again with them,
+            there is only one pass if None
+        :param retry_confidence: lines which have word with lower confidence (0..100) are recognized again
+        """
+        self.languages = languages
+        self.block_parallel = block_parallel
+        self.max_blocks = max_blocks or os.cpu_count() or 1
+        self.cache = cache
+        self.preprocessor = preprocessor or Preprocessor([])
+        # detection is useful only if selected languages are written with different scripts
+        self.script_detection = script_detection and len(
+            set().union(*map(get_scripts, languages.split("+")))
+        ) > 1
+        self.fast_tessdata = fast_tessdata
+        self.best_tessdata = best_tessdata
+        self.retry_confidence = retry_confidence
+        self.__executor: ThreadPoolExecutor | None = None
+        self.__lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: Settings | SettingsSnapshot):
+        return cls(
+            "+".join(settings.languages),
+            block_parallel=settings.is_block_parallel,
+            cache=OcrCache(folder=get_cache_folder() if settings.is_disk_cache else None),
+            preprocessor=Preprocessor.from_profile(settings.preprocess_profile, list(settings.preprocess_stages)),
+            script_detection=settings.is_script_detection,
+            fast_tessdata=settings.fast_tessdata or None,
+            best_tessdata=settings.best_tessdata or None,
+            retry_confidence=settings.retry_confidence
+        )
+
+    @property
+    def config(self) -> str:
+        # options which change result of recognition, part of cache key
+        config = (f"block_parallel={self.block_parallel}|preprocess={self.preprocessor}|"
+                  f"script_detection={self.script_detection}")
+        if self.fast_tessdata or self.best_tessdata:
+            config += f"|fast={self.fast_tessdata}|best={self.best_tessdata}|retry={self.retry_confidence}"
+        return config
+
+    def warm_up(self, count: int = 1):
+        # load models of all passes for count of threads
+        engines.warm_up(self.languages, count, self.fast_tessdata)
+        if self.best_tessdata:
+            engines.warm_up(self.languages, count, self.best_tessdata)
+        if self.script_detection:
+            engines.warm_up("osd", count)
+
+    def run(self, image: np.ndarray, timer: CaptureTimer | None = None) -> str:
+        """
+        :param timer: timer of capture, spans of stages are added to it
+        """
+        timer = timer or CaptureTimer()
+        if self.cache is None:
+            return self.__recognize(image, timer)
+
+        with timer.span("cache"):
+            key = self.cache.key(image, self.languages, self.config)
+            text = self.cache.get(key)
+        if text is None:
+            text = self.__recognize(image, timer)
+            self.cache.put(key, text)
+        logger.debug("ocr cache %s", self.cache.stats())
+        return text
+
+    def run_words(self, image: np.ndarray, timer: CaptureTimer | None = None, preprocess: bool = True,
+                  cache: bool = True, detect_script: bool = True) -> WordBoxes:
+        """
+        Extracting words with their boxes and confidences
+        :param timer: timer of capture, spans of stages are added to it
+        :param preprocess: False if image is already preprocessed, e.g. composite of preprocessed crops
+        :param cache: False if image does not repeat, e.g. composite, so it does not evict useful entries
+        :param detect_script: False if image has text of different scripts, e.g. composite of crops,
+            so all selected languages are used
+        """
+        timer = timer or CaptureTimer()
+        if self.cache is None or not cache:
+            return self.__recognize(image, timer, words=True, preprocess=preprocess, detect_script=detect_script)
+
+        # words are cached as TSV, in the same cache as texts
+        with timer.span("cache"):
+            config = self.config + ("|words" if preprocess else "|words|raw") + ("" if detect_script else "|all")
+            key = self.cache.key(image, self.languages, config)
+            tsv = self.cache.get(key)
+        if tsv is not None:
+            return WordBoxes.from_tsv(tsv)
+        words = self.__recognize(image, timer, words=True, preprocess=preprocess, detect_script=detect_script)
+        self.cache.put(key, words.to_tsv())
+        return words
+
+    def __recognize(self, image: np.ndarray, timer: CaptureTimer, words: bool = False,
+                    preprocess: bool = True, detect_script: bool = True) -> str | WordBoxes:
+        with timer.span("preprocess"):
+            if preprocess:
+                image = self.preprocessor(image)
+            # engines read 4 channels as RGBA, BGRA buffer of screen capture is reduced to gray once
+            if image.ndim == 3 and image.shape[2] == 4:
+                image = grayscale(image)
+        if self.script_detection and detect_script:
+            with timer.span("detect_script"):
+                languages = self.detect_languages(image)
+        else:
+            languages = self.languages
+        height, width = image.shape[:2]
+        # boxes and confidences of words are needed to choose lines for second pass
+        tiered = self.best_tessdata is not None
+        with timer.span("ocr"):
+            if self.block_parallel and self.max_blocks > 1 and height * width >= self.min_parallel_area:
+                result = self.__run_blocks(image, languages, words or tiered, self.fast_tessdata)
+            else:
+                result = self.__ocr(image, languages, words or tiered, self.fast_tessdata)
+        if not tiered:
+            return result
+        with timer.span("retry"):
+            result = self.__retry_lines(image, languages, result)
+        return result if words else result.to_text()
+
+    def detect_languages(self, image: np.ndarray) -> str:
+        """
+        Getting languages of selected which script is in image
+        :return: languages in tesseract format, all selected languages if script is not detected
+        """
+        if not self.script_detection:
+            return self.languages
+        with engines.engine("osd") as engine:
+            script = engine.detect_script(image)
+        if script is None or script[1] < self.min_script_confidence:
+            return self.languages
+        languages = get_languages_of_script(script[0], self.languages.split("+"))
+        logger.debug("detected script %s, languages %s", script, languages)
+        return "+".join(languages) if languages else self.languages
+
+    def __ocr(self, image: np.ndarray, languages: str, words: bool = False,
+              tessdata: str | None = None) -> str | WordBoxes:
+        with engines.engine(languages, tessdata) as engine:
+            return engine.image_to_data(image) if words else engine.image_to_string(image)
+
+    def __get_executor(self) -> ThreadPoolExecutor:
+        with self.__lock:
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(self.max_blocks, thread_name_prefix="ocr-block")
+            return self.__executor
+
+    def __run_blocks(self, image: np.ndarray, languages: str, words: bool = False,
+                     tessdata: str | None = None) -> str | WordBoxes:
+        blocks = split_blocks(grayscale(image), self.max_blocks)
+        if len(blocks) <= 1:
+            return self.__ocr(image, languages, words, tessdata)
+        # map keeps order of blocks, so text is stitched in reading order
+        results = self.__get_executor().map(partial(self.__ocr, languages=languages, words=words, tessdata=tessdata),
+                                            (image[rows, columns] for rows, columns in blocks))
+        if words:
+            # boxes are moved from coordinates of block to coordinates of image
+            return WordBoxes.concat(list(results), [(columns.start, rows.start) for rows, columns in blocks])
+        return "\n".join(text.strip("\n\f") for text in results) + "\n"
+
+    def __retry_lines(self, image: np.ndarray, languages: str, words: WordBoxes) -> WordBoxes:
+        # lines with low confidence are recognized again by accurate models, other lines are kept from first pass
+        lines = [indexes for _, indexes in words.lines()]
+        weak = [number for number, indexes in enumerate(lines) if words.conf[indexes].min() < self.retry_confidence]
+        if not weak:
+            return words
+        height, width = image.shape[:2]
+        crops = []
+        for number in weak:
+            boxes = words.boxes[lines[number]]
+            left, top = boxes[:, 0].min(), boxes[:, 1].min()
+            right, bottom = (boxes[:, 0] + boxes[:, 2]).max(), (boxes[:, 1] + boxes[:, 3]).max()
+            # tesseract needs margin around text
+            margin = max(4, int(bottom - top) // 3)
+            crops.append((max(0, int(left) - margin), max(0, int(top) - margin),
+                          min(width, int(right) + margin), min(height, int(bottom) + margin)))
+        retried = self.__get_executor().map(
+            partial(self.__ocr, languages=languages, words=True, tessdata=self.best_tessdata),
+            (image[top:bottom, left:right] for left, top, right, bottom in crops)
+        )
+
+        parts = [words.take(indexes) for indexes in lines]
+        for number, (left, top, _, _), result in zip(weak, crops, retried):
+            # result of accurate models is used only if they are more sure
+            if not len(result) or result.conf.mean() <= parts[number].conf.mean():
+                continue
+            result = result.shifted(left, top)
+            result.layout[:] = parts[number].layout[0]
+            parts[number] = result
+        logger.debug("%s of %s lines are recognized again", len(weak), len(lines))
+        return WordBoxes.join(parts)
+
+    def close(self):
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=False)
+            self.__executor = None
@@ -0,0 +1,101 @@
+# Image preprocessing before OCR
+#   stages are vectorized functions image -> image, profile is ordered list of stages
+#   3 channel images are RGB (Pillow), 4 channel images are BGRA (screen buffers)
+from typing import Callable
+import cv2
+import numpy as np
+
+Stage = Callable[[np.ndarray], np.ndarray]
+
+STAGES: dict[str, Stage] = {}
+
+
+def stage(name: str):
+    # register function as stage of preprocessing
+    def decorator(function: Stage) -> Stage:
+        STAGES[name] = function
+        return function
+    return decorator
+
+
+@stage("grayscale")
+def grayscale(image: np.ndarray) -> np.ndarray:
+    if image.ndim == 2:
+        return image
+    if image.shape[2] == 4:
+        return cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY)
+    return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+
+
+@stage("invert_dark")
+def invert_dark(image: np.ndarray) -> np.ndarray:
+    # tesseract expects dark text on light background
+    gray = grayscale(image)
+    if gray[::4, ::4].mean() < 128:
+        return cv2.bitwise_not(gray)
+    return gray
+
+
+@stage("denoise")
+def denoise(image: np.ndarray) -> np.ndarray:
+    return cv2.medianBlur(grayscale(image), 3)
+
+
+@stage("threshold")
+def adaptive_threshold(image: np.ndarray) -> np.ndarray:
+    # local threshold keeps low contrast text on gradients and colored panels
+    return cv2.adaptiveThreshold(grayscale(image), 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                 cv2.THRESH_BINARY, 31, 15)
+
+
+@stage("deskew")
+def deskew(image: np.ndarray, max_angle: float = 15.0) -> np.ndarray:
+    gray = grayscale(image)
+    # ink is dark after invert_dark, its bounding rotated rectangle gives angle of text
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    points = cv2.findNonZero(ink)
+    if points is None:
+        return gray
+    angle = cv2.minAreaRect(points)[2]
+    # range of angle of minAreaRect depends on OpenCV version, text is near horizontal
+    if angle > 45:
+        angle -= 90
+    elif angle < -45:
+        angle += 90
+    if abs(angle) < 0.3 or abs(angle) > max_angle:
+        return gray
+    height, width = gray.shape
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(gray, matrix, (width, height), flags=cv2.INTER_LINEAR,
+                          borderMode=cv2.BORDER_REPLICATE)
+
+
+PROFILES: dict[str, list[str]] = {
+    "none": [],
+    "screen": ["grayscale", "invert_dark"],
+    "low_contrast": ["grayscale", "invert_dark", "denoise", "threshold"],
+    "document": ["grayscale", "invert_dark", "denoise", "deskew", "threshold"],
+}
+
+
+class Preprocessor:
+    def __init__(self, stages: list[str]):
+        unknown = [name for name in stages if name not in STAGES]
+        if unknown:
+            raise ValueError(f"Unknown preprocessing stages: {', '.join(unknown)}")
+        self.stages = list(stages)
+
+    @classmethod
+    def from_profile(cls, profile: str, custom_stages: list[str] | None = None):
+        # "custom" profile uses stages from settings
+        if profile == "custom":
+            return cls(custom_stages or [])
+        return cls(PROFILES.get(profile, PROFILES["screen"]))
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        for name in self.stages:
+            image = STAGES[name](image)
+        return image
+
+    def __str__(self):
+        return "+".join(self.stages) or "none"
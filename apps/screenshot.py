@@ -1,21 +1,22 @@
 # PyQt5 imports
 import PIL.Image
-from PyQt5.QtWidgets import QApplication
 from PyQt5 import QtCore, QtGui, QtWidgets
-# work with images (PIL/Pillow)
-from PIL import ImageGrab
 # my modules
-from apps.utils import get_default_save_folder
-from apps.config import Settings
+from apps.capture import CaptureBackend, create_backend, map_to_physical, to_image
+from apps.config import Settings, get_settings
+from apps.metrics import CaptureTimer
 # default modules
-import datetime
 import os.path
+import time
+import numpy as np
 
 
 class SnippingWidget(QtWidgets.QMainWindow):
     closed = QtCore.pyqtSignal()
+    # latency in ms from request of overlay to its first paint
+    shown = QtCore.pyqtSignal(float)
 
-    def __init__(self, parent=None, screenshot_path: str = None, file_name: str = None):
+    def __init__(self, parent=None, settings: Settings = None):
         super(SnippingWidget, self).__init__(parent)
         self.setAttribute(QtCore.Qt.WA_NoSystemBackground, True)
         self.setAttribute(QtCore.Qt.WA_TranslucentBackground, True)
@@ -24,11 +25,17 @@ class SnippingWidget(QtWidgets.QMainWindow):
 
         # variable for store last screenshot
         self.last_screenshot = None
-        # settings
-        self.__settings = Settings()
-
-        # path of photos
-        self.screenshot_path = self.__get_screenshot_path(screenshot_path, file_name)
+        # settings, can be shared with owner of widget to see changes
+        self.__settings = settings or get_settings()
+
+        # time when overlay was requested, it is used to measure latency of overlay
+        self.__requested_at: float | None = None
+        self.last_show_latency: float | None = None
+        self.last_grab_ms: float | None = None
+        # selected region in physical pixels of screen (left, top, width, height)
+        self.last_region: tuple[int, int, int, int] | None = None
+        # capture handle is opened by first grab, in Qt thread, and kept open
+        self.__backend: CaptureBackend | None = None
 
         # settings of square
         self.outsideSquareColor = "red"
@@ -43,32 +50,55 @@ class SnippingWidget(QtWidgets.QMainWindow):
         self.setWindowFlags(self.windowFlags() | QtCore.Qt.WindowStaysOnTopHint)
         #   overrides the keyboard handler on an empty method 'keyPressEvent'
         self.setFocusPolicy(QtCore.Qt.NoFocus)
-        #   full screen
+        #   full screen, native window is created once and then only shown by start()
         self.showFullScreen()
-        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.CrossCursor)
         self.hide()
 
-    def __get_screenshot_path(self, screenshot_path, file_name):
-        # generates filename
-        if file_name is None:
-            file_name = datetime.datetime.now().strftime("%Y%m%d_%H%M%S") + ".jpg"
-        # check if we got screenshot_path
-        if screenshot_path is None or not self.__settings.is_save_photos:
-            default_dir = get_default_save_folder()
-            # check if folder is not exists
-            if not os.path.exists(default_dir):
-                os.mkdir(default_dir)
-
-            # create path with file
-            screenshot_path = os.path.join(default_dir, file_name)
-        else:
-            # if we got path from user
-            if not os.path.exists(screenshot_path):
-                os.mkdir(screenshot_path)
-
-            # create path with file
-            screenshot_path = os.path.join(screenshot_path, file_name)
-        return screenshot_path
+    def start(self, requested_at: float | None = None):
+        """
+        Showing overlay for new selection
+        :param requested_at: time.perf_counter() value of hotkey press
+        """
+        self.__requested_at = requested_at if requested_at is not None else time.perf_counter()
+        self.last_screenshot = None
+        self.last_show_latency = None
+        self.last_grab_ms = None
+        self.last_region = None
+        self.start_point = QtCore.QPoint()
+        self.end_point = QtCore.QPoint()
+        self.__move_to_cursor_screen()
+        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.CrossCursor)
+        self.showFullScreen()
+        self.raise_()
+        self.activateWindow()
+
+    def __move_to_cursor_screen(self):
+        # overlay covers screen where user is working, each screen can have its own scale
+        screen = QtWidgets.QApplication.screenAt(QtGui.QCursor.pos())
+        window = self.windowHandle()
+        if screen is None or window is None or window.screen() is screen:
+            return
+        window.setScreen(screen)
+        self.setGeometry(screen.geometry())
+
+    def grab(self, rect: QtCore.QRect) -> np.ndarray:
+        """
+        Capturing selected part of overlay
+        :param rect: rectangle in coordinates of overlay
+        :return: BGRA (mss) or RGB (Pillow) array
+        """
+        if self.__backend is None:
+            self.__backend = create_backend()
+        screen = self.windowHandle().screen()
+        self.last_region = map_to_physical(QtCore.QRect(self.mapToGlobal(rect.topLeft()), rect.size()), screen)
+        return self.__backend.grab(*self.last_region)
+
+    def record_timings(self, timer: CaptureTimer):
+        # latency of overlay and grab of last capture
+        if self.last_show_latency is not None:
+            timer.add("overlay", self.last_show_latency)
+        if self.last_grab_ms is not None:
+            timer.add("grab", self.last_grab_ms)
 
     def mousePressEvent(self, event):
         self.start_point = event.pos()
@@ -86,15 +116,13 @@ class SnippingWidget(QtWidgets.QMainWindow):
         # get coordinates
         r = QtCore.QRect(self.start_point, self.end_point).normalized()
         self.hide()
-        # grab image from coordinates
-        img = ImageGrab.grab(bbox=r.getCoords())
-        # saving image
-        try:
-            img.save(self.screenshot_path)
-            self.last_screenshot = img
-        except ValueError:  # if trying to save empty image
-            self.last_screenshot = ScreenShot(self.screenshot_path)
-            self.last_screenshot.image.save(self.screenshot_path)
+        # grab pixels of selection, they are kept in memory
+        grab_start = time.perf_counter()
+        if r.width() > 1 and r.height() > 1:
+            self.last_screenshot = self.grab(r)
+        else:  # empty selection
+            self.last_screenshot = ScreenShot().image
+        self.last_grab_ms = (time.perf_counter() - grab_start) * 1000
         # The cursor is reset to its default state before the window is closed.
         QtWidgets.QApplication.restoreOverrideCursor()
         self.closed.emit()
@@ -120,43 +148,61 @@ class SnippingWidget(QtWidgets.QMainWindow):
         trans.setAlphaF(0)
         qp.setBrush(trans)
         qp.drawRect(r)
+        qp.end()
+
+        # first paint after request, overlay is visible for user
+        if self.__requested_at is not None:
+            self.last_show_latency = (time.perf_counter() - self.__requested_at) * 1000
+            self.__requested_at = None
+            self.shown.emit(self.last_show_latency)
 
 
 class ScreenShot:
-    def __init__(self, path: str, image: PIL.Image.Image = None):
+    def __init__(self, path: str | None = None, image: PIL.Image.Image | np.ndarray = None):
+        # path of image file, None if image is captured in memory
         self.path = path
-        if not image:
+        if image is None:
             # if path doesn't exist
             try:
-                image = PIL.Image.open(path)
+                image = PIL.Image.open(path) if path is not None else self.__default_image()
             except FileNotFoundError:
                 image = self.__default_image()
-        self.image: PIL.Image.Image = image
+        # captured buffer (BGRA or RGB array) or image loaded by Pillow
+        self.image: PIL.Image.Image | np.ndarray = image
 
     def show(self):
         # show image
-        self.image.show(os.path.basename(self.path))
-
-    def __default_image(self) -> PIL.Image.Image:
+        self.to_image().show(os.path.basename(self.path) if self.path else None)
+
+    def to_array(self) -> np.ndarray:
+        # captured buffer is passed to OCR as is, without copy and round trip through disk
+        if isinstance(self.image, np.ndarray):
+            return self.image
+        image = self.image if self.image.mode == "RGB" else self.image.convert("RGB")
+        return np.asarray(image)
+
+    def to_image(self) -> PIL.Image.Image:
+        if isinstance(self.image, PIL.Image.Image):
+            return self.image
+        return to_image(self.image)
+
+    @staticmethod
+    def __default_image() -> PIL.Image.Image:
         """
         Getting default image without any text
         :return: PIL image
         """
         width, height = 400, 300
-        white_image = PIL.Image.new('RGB', (width, height), 'white')
-        white_image.save(self.path)
-        return white_image
+        return PIL.Image.new('RGB', (width, height), 'white')
+
+    # overlay is created once per process and reused by every screenshot
+    __overlay: SnippingWidget | None = None
 
     @classmethod
-    def make_screenshot(cls):
-        app = QApplication([])
-        # get config
-        settings = Settings()
-        # create and start app
-        widget = SnippingWidget(screenshot_path=settings.save_folder)
-        widget.show()
-        # execute app and exit app after execute
-        app.exec_()
-        # create instance of ScreenShot class for return user
-        screen = cls(widget.screenshot_path, widget.last_screenshot)
-        return screen
+    def get_overlay(cls, settings: Settings = None) -> SnippingWidget:
+        """
+        :param settings: settings which overlay follows, settings of process are used if None
+        """
+        if cls.__overlay is None:
+            cls.__overlay = SnippingWidget(settings=settings)
+        return cls.__overlay
@@ -0,0 +1,100 @@
+from PyQt5.QtCore import Qt, QUrl
+from PyQt5.QtGui import QDesktopServices
+from PyQt5.QtWidgets import (QApplication, QDialog, QHBoxLayout, QLabel, QLineEdit, QListWidget, QListWidgetItem,
+                             QPushButton, QVBoxLayout)
+from apps.config import Settings
+from apps.history import History, HistoryRecord
+from apps.utils import get_default_save_folder, get_history_path
+import datetime
+
+
+class HistorySearchDialog(QDialog):
+    def __init__(self, settings: Settings, parent=None):
+        super().__init__(parent)
+        self.__settings = settings
+        # history is written by extractor process, it is opened only when search is used
+        self.__history: History | None = None
+
+        self.setWindowTitle(f"{settings.title} - History")
+        self.resize(640, 420)
+
+        self.query_edit = QLineEdit(self)
+        self.query_edit.setPlaceholderText("Search extracted text")
+        self.query_edit.textChanged.connect(self.search)
+
+        self.results_list = QListWidget(self)
+        self.results_list.itemDoubleClicked.connect(self.copy_selected)
+        self.results_list.currentItemChanged.connect(self.__update_buttons)
+
+        self.status_label = QLabel(self)
+
+        self.copy_button = QPushButton("Copy", self)
+        self.copy_button.clicked.connect(self.copy_selected)
+        self.image_button = QPushButton("Open image", self)
+        self.image_button.clicked.connect(self.open_image)
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.status_label)
+        buttons.addStretch()
+        buttons.addWidget(self.copy_button)
+        buttons.addWidget(self.image_button)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.query_edit)
+        layout.addWidget(self.results_list)
+        layout.addLayout(buttons)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.query_edit.setFocus()
+        self.search()
+
+    def search(self):
+        if self.__history is None:
+            self.__history = History(get_history_path())
+        records = self.__history.search(self.query_edit.text())
+
+        self.results_list.clear()
+        for record in records:
+            captured_at = datetime.datetime.fromtimestamp(record.time).strftime("%Y-%m-%d %H:%M")
+            first_line = next((line for line in record.text.splitlines() if line.strip()), "")
+            item = QListWidgetItem(f"{captured_at}  {first_line[:100]}")
+            item.setToolTip(record.text[:1000])
+            item.setData(Qt.UserRole, record)
+            self.results_list.addItem(item)
+        self.status_label.setText(f"{len(records)} results")
+        if records:
+            self.results_list.setCurrentRow(0)
+        self.__update_buttons()
+
+    def copy_selected(self):
+        record = self.__selected_record()
+        if record is not None:
+            QApplication.clipboard().setText(record.text)
+
+    def open_image(self):
+        path = self.__image_path(self.__selected_record())
+        if path is not None:
+            QDesktopServices.openUrl(QUrl.fromLocalFile(path))
+
+    def closeEvent(self, event):
+        if self.__history is not None:
+            self.__history.close()
+            self.__history = None
+        super().closeEvent(event)
+
+    def __selected_record(self) -> HistoryRecord | None:
+        item = self.results_list.currentItem()
+        return item.data(Qt.UserRole) if item is not None else None
+
+    def __image_path(self, record: HistoryRecord | None) -> str | None:
+        if record is None or record.image_key is None:
+            return None
+        # archive module loads Pillow, so it is imported only if image is needed
+        from apps.archive import find_image
+        return find_image(self.__settings.save_folder or get_default_save_folder(), record.image_key)
+
+    def __update_buttons(self):
+        record = self.__selected_record()
+        self.copy_button.setEnabled(record is not None)
+        self.image_button.setEnabled(record is not None and record.image_key is not None)
@@ -0,0 +1,187 @@
+# Supervision of hotkey listener and event loop processes from tray process
+#   listener is restarted if it dies, its keyboard hook dies or computer wakes up from sleep (hook of sleeping
+#   process can be removed by system), it is small, so restart is fast and event loop keeps its models.
+#   event loop sends heartbeat from its Qt thread, it is replaced if its process dies or heartbeat stops,
+#   and it is recycled when it is idle and its memory is over limit.
+#   standby event loop is started and warmed up in advance, so replacement is activation, not cold start
+import logging
+import time
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from apps.config import Settings
+from apps.hotkey import HotkeyListener
+from apps.textExtractor import HEARTBEAT_INTERVAL, EventLoopWorker, TextExtractor
+
+logger = logging.getLogger(__name__)
+
+
+class Supervisor(QObject):
+    # reason of replacement of active event loop
+    replaced = pyqtSignal(str)
+    # reason why supervision is stopped and hotkey can stay dead, user must be told about it
+    failed = pyqtSignal(str)
+
+    def __init__(self, extractor: TextExtractor, settings: Settings, interval: float = HEARTBEAT_INTERVAL,
+                 stall_timeout: float = 10.0, start_timeout: float = 60.0, sleep_gap: float = 30.0,
+                 max_failovers: int = 5, failover_window: float = 300.0, max_rss: int = 1536 * 1024 * 1024,
+                 parent=None):
+        """
+        :param interval: seconds between checks
+        :param stall_timeout: seconds without heartbeat after which event loop is hung
+        :param start_timeout: seconds for new process to send first heartbeat
+        :param sleep_gap: delay of check which means that computer was sleeping
+        :param max_failovers: replacements in failover_window after which supervision is stopped,
+            e.g. event loop can not start at all; the same limit is used for restarts of hotkey listener
+        :param max_rss: bytes of resident memory of idle event loop after which it is recycled, 0 is unlimited
+        """
+        super().__init__(parent)
+        self.extractor = extractor
+        self.interval = interval
+        self.stall_timeout = stall_timeout
+        self.start_timeout = start_timeout
+        self.sleep_gap = sleep_gap
+        self.max_failovers = max_failovers
+        self.failover_window = failover_window
+        self.max_rss = max_rss
+        self.__settings = settings
+        # event loop is recycled when standby is ready, standby is started for it even if hot standby is off
+        self.__is_recycling = False
+        self.__failovers: list[float] = []
+        self.__listener_restarts: list[float] = []
+        # liveness of hook relies on private threads of keyboard, it is ignored if it keeps failing after restarts
+        self.__is_hook_checked = True
+        self.__last_check: tuple[float, float] | None = None
+        self.__timer = QTimer(self)
+        self.__timer.timeout.connect(self.check)
+
+    def start(self):
+        self.extractor.start_hotkey_listener()
+        self.extractor.start_event_loop()
+        self.__last_check = None
+        self.__timer.start(int(self.interval * 1000))
+
+    def stop(self):
+        self.__timer.stop()
+
+    def check(self):
+        slept = self.__was_sleeping()
+        self.extractor.poll_workers()
+        active = self.extractor.active_worker
+        if active is None:
+            return
+        self.__check_listener(slept)
+        reason = self.__failure(active)
+        if reason is not None:
+            self.__failover(reason)
+            return
+        self.__check_recycle(active)
+        self.__check_standby()
+
+    def __was_sleeping(self) -> bool:
+        # monotonic clock stops during sleep on some systems, wall clock can be changed by user, both are checked
+        now = time.monotonic(), time.time()
+        last, self.__last_check = self.__last_check, now
+        if last is None:
+            return False
+        return max(now[0] - last[0], now[1] - last[1]) > self.interval + self.sleep_gap
+
+    def __failure(self, worker: EventLoopWorker | HotkeyListener) -> str | None:
+        # reason why process must be replaced, None if it works
+        if not worker.is_alive:
+            return f"process is exited with code {worker.process.exitcode}"
+        if worker.last_beat is None:
+            if time.monotonic() - worker.started_at > self.start_timeout:
+                return "process is not started"
+            return None
+        if time.monotonic() - worker.last_beat > self.stall_timeout:
+            return "process does not respond"
+        return None
+
+    def __check_listener(self, slept: bool):
+        listener = self.extractor.hotkey_listener
+        if listener is None:
+            self.extractor.start_hotkey_listener()
+            return
+        reason = self.__failure(listener)
+        if reason is None and slept:
+            reason = "computer is woken up"
+        is_hook_dead = reason is None and listener.last_beat is not None and listener.is_hook_alive is False
+        if is_hook_dead and self.__is_hook_checked:
+            reason = "keyboard hook is dead"
+        if reason is None:
+            return
+        now = time.monotonic()
+        self.__listener_restarts = [at for at in self.__listener_restarts if now - at < self.failover_window] + [now]
+        if len(self.__listener_restarts) > self.max_failovers:
+            if is_hook_dead:
+                # e.g. new version of keyboard library, hook is reported dead in every new process
+                logger.error("keyboard hook is reported dead after %s restarts, its check is disabled",
+                             len(self.__listener_restarts) - 1)
+                self.__is_hook_checked = False
+                return
+            logger.error("hotkey listener is restarted %s times in %.0f s, supervision is stopped",
+                         len(self.__listener_restarts) - 1, self.failover_window)
+            self.stop()
+            self.failed.emit(f"hotkey listener is restarted {len(self.__listener_restarts) - 1} times "
+                             f"in {self.failover_window:.0f} s, last failure: {reason}")
+            return
+        logger.warning("hotkey listener is restarted: %s", reason)
+        self.extractor.restart_hotkey_listener()
+
+    def __check_recycle(self, active: EventLoopWorker):
+        # memory of long running event loop is returned to system by new process, when no capture is pending
+        if not self.max_rss or active.rss is None or active.rss <= self.max_rss:
+            self.__is_recycling = False
+            return
+        standby = self.extractor.standby_worker
+        if standby is None:
+            self.__is_recycling = True
+            self.extractor.start_standby()
+            return
+        if not (standby.is_ready and active.is_idle):
+            return
+        if standby.rss is not None and standby.rss > self.max_rss:
+            # fresh process is over limit too (e.g. models of many languages), recycling would not stop
+            logger.warning("new event loop uses %.0f MB too, recycling is disabled", standby.rss / 1024 / 1024)
+            self.max_rss = 0
+            self.__is_recycling = False
+            return
+        logger.info("event loop uses %.0f MB, it is replaced by standby", active.rss / 1024 / 1024)
+        self.__is_recycling = False
+        self.extractor.failover()
+
+    def __failover(self, reason: str):
+        active = self.extractor.active_worker
+        if not active.is_alive and active.process.exitcode == 0:
+            # event loop quits itself, e.g. tesseract is not found and user was notified
+            logger.info("event loop is stopped, supervision is stopped")
+            self.extractor.stop_event_loop()
+            self.stop()
+            return
+        now = time.monotonic()
+        self.__failovers = [at for at in self.__failovers if now - at < self.failover_window] + [now]
+        if len(self.__failovers) > self.max_failovers:
+            logger.error("event loop is replaced %s times in %.0f s, supervision is stopped",
+                         len(self.__failovers) - 1, self.failover_window)
+            self.stop()
+            self.failed.emit(f"event loop is replaced {len(self.__failovers) - 1} times "
+                             f"in {self.failover_window:.0f} s, last failure: {reason}")
+            return
+        is_standby = self.extractor.failover()
+        logger.warning("event loop is replaced by %s: %s", "standby" if is_standby else "new process", reason)
+        self.replaced.emit(reason)
+
+    def __check_standby(self):
+        standby = self.extractor.standby_worker
+        if not self.__settings.is_hot_standby and not self.__is_recycling:
+            if standby is not None:
+                self.extractor.stop_standby()
+            return
+        if standby is None:
+            # standby is started after active event loop is ready, so they do not load models at the same time
+            if self.extractor.active_worker.is_ready:
+                self.extractor.start_standby()
+            return
+        reason = self.__failure(standby)
+        if reason is not None:
+            logger.warning("standby event loop is restarted: %s", reason)
+            self.extractor.stop_standby()
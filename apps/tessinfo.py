@@ -0,0 +1,153 @@
+# Cached inventory of tesseract: version and installed languages
+#   tesseract is probed only if its binary, tessdata folder or TESSDATA_PREFIX was changed (by mtime and size),
+#   so menus and startup do not wait for subprocess
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+from apps.utils import get_main_dir
+
+# default command of pytesseract, it is resolved here without importing pytesseract (and PIL and NumPy with it)
+TESSERACT_CMD = "tesseract"
+
+_lock = threading.Lock()
+_info: dict | None = None
+
+
+class TesseractNotFoundError(EnvironmentError):
+    def __init__(self, command: str = TESSERACT_CMD):
+        super().__init__(f"{command} is not installed or it's not in your PATH. "
+                         f"See README file for more information.")
+
+
+class TesseractProbeError(EnvironmentError):
+    # tesseract is found, but it fails, e.g. tessdata folder is not found
+    pass
+
+
+def get_cache_path():
+    return os.path.join(get_main_dir(), "tesseract.json")
+
+
+def get_command() -> str:
+    """
+    Command which pytesseract runs, pytesseract.pytesseract.tesseract_cmd is used if it is set,
+    pytesseract is not imported for it
+    """
+    module = sys.modules.get("pytesseract")
+    return getattr(getattr(module, "pytesseract", None), "tesseract_cmd", None) or TESSERACT_CMD
+
+
+def get_binary() -> str:
+    command = get_command()
+    binary = shutil.which(command)
+    if binary is None:
+        raise TesseractNotFoundError(command)
+    return os.path.realpath(binary)
+
+
+def _stat(path: str | None) -> list[int] | None:
+    try:
+        stat = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _fingerprint(binary: str, tessdata: str | None) -> dict:
+    # TESSDATA_PREFIX changes folder of models without changing binary
+    return {"binary": binary, "binary_stat": _stat(binary), "tessdata": tessdata, "tessdata_stat": _stat(tessdata),
+            "tessdata_prefix": os.environ.get("TESSDATA_PREFIX")}
+
+
+def _run(binary: str, option: str) -> str:
+    kwargs = {}
+    if sys.platform.startswith("win"):
+        # do not flash console window
+        kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+    result = subprocess.run([binary, option], capture_output=True, text=True, encoding="utf-8", **kwargs)
+    if result.returncode != 0:
+        # failed probe is not cached, e.g. tessdata folder can be fixed without changing binary
+        raise TesseractProbeError(f"{binary} {option} is failed with code {result.returncode}: "
+                                  f"{(result.stderr or result.stdout).strip()}")
+    # older versions print to stderr
+    return result.stdout or result.stderr
+
+
+def _parse_version(output: str) -> str:
+    # first line is e.g. "tesseract 5.3.0" or "tesseract v5.0.0-alpha.20201127"
+    match = re.search(r"tesseract\s+v?(\S+)", output)
+    return match.group(1) if match else "unknown"
+
+
+def _probe(binary: str) -> dict:
+    lines = _run(binary, "--list-langs").splitlines()
+    match = re.search(r'"(.+)"', lines[0]) if lines else None
+    tessdata = os.path.realpath(match.group(1)) if match else None
+    return {
+        **_fingerprint(binary, tessdata),
+        "version": _parse_version(_run(binary, "--version")),
+        "languages": sorted(line.strip() for line in lines[1:] if line.strip()),
+    }
+
+
+def _is_valid(info: dict | None, binary: str) -> bool:
+    if info is None or info.get("binary") != binary:
+        return False
+    fingerprint = _fingerprint(binary, info.get("tessdata"))
+    return all(info.get(key) == value for key, value in fingerprint.items())
+
+
+def _read_cache() -> dict | None:
+    try:
+        with open(get_cache_path(), encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(info: dict):
+    try:
+        with open(get_cache_path(), "w", encoding="utf-8") as file:
+            json.dump(info, file)
+    except OSError:  # cache is optional, e.g. folder of app is read only
+        pass
+
+
+def get_info() -> dict:
+    """
+    Getting version and languages of tesseract, subprocess is started only if tesseract was changed
+    :return: dict with version, languages, binary and tessdata paths
+    """
+    global _info
+    with _lock:
+        binary = get_binary()
+        if _is_valid(_info, binary):
+            return _info
+        info = _read_cache()
+        if not _is_valid(info, binary):
+            info = _probe(binary)
+            _write_cache(info)
+        _info = info
+        return _info
+
+
+def get_languages() -> list[str]:
+    return get_info()["languages"]
+
+
+def get_version() -> str:
+    return get_info()["version"]
+
+
+def invalidate():
+    global _info
+    with _lock:
+        _info = None
+        try:
+            os.remove(get_cache_path())
+        except FileNotFoundError:
+            pass
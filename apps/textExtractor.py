@@ -1,81 +1,597 @@
-import os
-from pytesseract import TesseractNotFoundError
-from apps.screenshot import ScreenShot
+# tray imports this module, so OCR and capture modules (pytesseract, tesserocr, cv2, numpy, PIL)
+#   are imported only by event loop process when they are needed, tray is shown without waiting for them.
+#   hotkey is handled by small listener process (see apps.hotkey), tray passes presses to active event loop
 from apps.notification import ScreenShotNotification, show_wrong_msg
-from apps.config import Settings
-import pyperclip
-import cv2
-import pytesseract
-import keyboard
-from multiprocessing import Process
+from apps.config import SettingsSnapshot, get_settings
+from apps.hotkey import HotkeyListener
+from apps.metrics import CaptureTimer, MetricsLog, mark_startup
+from apps.utils import get_default_save_folder, get_history_path, get_metrics_path
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QApplication
+import logging
+import queue
+import threading
+import time
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from apps.screenshot import ScreenShot, SnippingWidget
+    from apps.pipeline import ExtractionPipeline
+    from apps.workers import OcrWorkerPool, OcrJob
+    from apps.archive import ScreenshotArchive
+    from apps.history import History
+    from apps.watch import RegionWatcher
+    from apps.words import WordBoxes
+
+logger = logging.getLogger(__name__)
+
+
+def _is_tesseract_not_found(ex: Exception) -> bool:
+    # pytesseract is not imported for check, it is loaded if extraction was started,
+    #   tessinfo raises its own error, so binary is looked up without pytesseract
+    from pytesseract import TesseractNotFoundError
+    from apps import tessinfo
+    return isinstance(ex, (TesseractNotFoundError, tessinfo.TesseractNotFoundError))
+
+
+# fields of Settings which are used by pipeline, it is recreated if one of them is changed
+PIPELINE_FIELDS = {"languages", "is_block_parallel", "is_disk_cache", "preprocess_profile",
+                   "preprocess_stages", "is_script_detection", "fast_tessdata", "best_tessdata", "retry_confidence"}
+# fields of Settings which are used by archive of screenshots
+ARCHIVE_FIELDS = {"save_folder", "archive_max_size", "archive_max_age"}
+# event loop reports that its Qt thread is responsive, see Supervisor
+HEARTBEAT_INTERVAL = 1.0
+# seconds between removals of old history by recorder
+HISTORY_RETENTION_INTERVAL = 3600.0
+
+
+class EventBridge(QObject):
+    # callbacks of worker and config threads, signals deliver them to Qt thread
+    pressed = pyqtSignal(float)
+    failed = pyqtSignal(object)
+    configured = pyqtSignal(dict)
+    watch = pyqtSignal(object)
+    activated = pyqtSignal()
+
+
+class EventLoopWorker:
+    # event loop process as it is seen from tray process
+    def __init__(self, process: Process, config_sender: Connection, heartbeat_receiver: Connection,
+                 is_active: bool):
+        self.process = process
+        self.is_active = is_active
+        self.started_at = time.monotonic()
+        # time.monotonic() of last heartbeat, None until Qt thread of process is running
+        self.last_beat: float | None = None
+        # models are loaded
+        self.is_ready = False
+        # memory of process and whether captures are pending, from last heartbeat
+        self.rss: int | None = None
+        self.is_idle = True
+        self.__config_sender = config_sender
+        # presses are sent by reader thread of hotkey listener, settings by Qt thread of tray
+        self.__send_lock = threading.Lock()
+        self.__heartbeat_receiver = heartbeat_receiver
+
+    @property
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def poll(self):
+        # reading heartbeats which are received since last poll
+        try:
+            while self.__heartbeat_receiver.poll():
+                beat = self.__heartbeat_receiver.recv()
+                self.last_beat = time.monotonic()
+                self.is_ready = beat["ready"]
+                self.rss = beat["rss"]
+                self.is_idle = beat["idle"]
+        except (EOFError, OSError):  # process is dead, it is seen by is_alive
+            pass
+
+    def send(self, kind: str, payload) -> bool:
+        # message to event loop, False if it is not delivered
+        try:
+            with self.__send_lock:
+                self.__config_sender.send((kind, payload))
+        except OSError:
+            return False
+        return True
+
+    def activate(self) -> bool:
+        self.is_active = True
+        # heartbeat of standby can be old, e.g. right after sleep, timeout is counted from activation
+        self.last_beat = time.monotonic()
+        return self.send("activate", None)
+
+    def stop(self, timeout: float | None = None):
+        """
+        :param timeout: seconds to wait for exit, then hung process is killed; not waiting if None
+        """
+        self.process.terminate()
+        self.__config_sender.close()
+        self.__heartbeat_receiver.close()
+        if timeout is not None:
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.kill()
+
+    def __str__(self):
+        return (f"EventLoopWorker(pid={self.process.pid}, active={self.is_active}, ready={self.is_ready}, "
+                f"rss={self.rss})")
 
 
 class TextExtractor:
-    # get Settings from registry
-    __settings = Settings()
-    # get languages from settings
-    languages = "+".join(__settings.languages)  # eng+rus+ukr for example
+    # settings of process, shared with overlay and notifications
+    __settings = get_settings()
+    # pipeline is created by first of worker and warm up threads
+    __pipeline_lock = threading.Lock()
+    # recorder is started by first delivered result
+    __recorder_lock = threading.Lock()
 
     def __init__(self, hotkey: str = __settings.hotkey):
         self.__hotkey = hotkey
-        self.__event_loop_process: Process | None = None
-
-    def screenshot_to_clip(self):
-        # take screenshot and get its path
-        screenshot_img = ScreenShot.make_screenshot()
-        img = cv2.imread(screenshot_img.path)
-
-        # if the photo is must not to be saved
-        #   and if path to photo exists, delete this photo and its parent directory
-        if not self.__settings.is_save_photos and os.path.exists(screenshot_img.path):
-            os.remove(screenshot_img.path)
-            directory = os.path.dirname(screenshot_img.path)
-            try:
-                os.rmdir(directory)
-            except OSError:  # maybe directory is not empty
-                for file in os.listdir(directory):
-                    os.remove(os.path.join(directory, file))
-                os.rmdir(directory)
+        # exist only in tray process: listener of hotkey, event loop which shows overlay on its presses
+        #   and warmed up event loop which replaces it
+        self.__listener: HotkeyListener | None = None
+        self.__active: EventLoopWorker | None = None
+        self.__standby: EventLoopWorker | None = None
+        # exist only in event loop process
+        self.__pool: "OcrWorkerPool | None" = None
+        self.__pipeline: "ExtractionPipeline | None" = None
+        self.__bridge: EventBridge | None = None
+        self.__archive: "ScreenshotArchive | None" = None
+        self.__history: "History | None" = None
+        # history and metrics are written by recorder thread, not by worker which delivers results in order
+        self.__records: "queue.Queue[tuple | None] | None" = None
+        self.__recorder: threading.Thread | None = None
+        self.__history_cleaned_at = 0.0
+        self.__overlay: "SnippingWidget | None" = None
+        self.__watcher: "RegionWatcher | None" = None
+        # options of watch which waits for selection of region
+        self.__watch_options: dict | None = None
+        self.__is_ready = False
+        self.__heartbeat_sender: Connection | None = None
+        # timings of captures
+        self.metrics = MetricsLog(get_metrics_path())
 
-        try:
-            # extract text from imag
-            text = pytesseract.image_to_string(img, self.languages)
-            # add text to clipboard
-            pyperclip.copy(text)
-        except TesseractNotFoundError as tesseract_nf_ex:
-            show_wrong_msg(tesseract_nf_ex)
-            self.stop_event_loop()
+    def __getstate__(self):
+        # extractor is passed to new event loop process, processes of other event loops are not
+        state = self.__dict__.copy()
+        state["_TextExtractor__active"] = state["_TextExtractor__standby"] = None
+        state["_TextExtractor__listener"] = None
+        state["_TextExtractor__heartbeat_sender"] = None
+        return state
+
+    @property
+    def active_worker(self) -> EventLoopWorker | None:
+        return self.__active
+
+    @property
+    def standby_worker(self) -> EventLoopWorker | None:
+        return self.__standby
+
+    @property
+    def hotkey_listener(self) -> HotkeyListener | None:
+        return self.__listener
+
+    @property
+    def languages(self) -> str:
+        # get languages from settings
+        return "+".join(self.__settings.languages)  # eng+rus+ukr for example
+
+    @property
+    def pipeline(self) -> "ExtractionPipeline":
+        # is created in process which extracts text
+        with self.__pipeline_lock:
+            if self.__pipeline is None:
+                from apps.pipeline import ExtractionPipeline
+                self.__pipeline = ExtractionPipeline.from_settings(self.__settings.snapshot)
+            return self.__pipeline
+
+    @property
+    def archive(self) -> "ScreenshotArchive":
+        # screenshots are saved by background writer of archive
+        if self.__archive is None:
+            from apps.archive import ScreenshotArchive
+            self.__archive = ScreenshotArchive(
+                self.__settings.save_folder or get_default_save_folder(),
+                max_size=self.__settings.archive_max_size * 1024 * 1024,
+                max_age=self.__settings.archive_max_age * 24 * 3600
+            )
+        return self.__archive
+
+    @property
+    def history(self) -> "History":
+        # results are searched by tray
+        if self.__history is None:
+            from apps.history import History
+            self.__history = History(get_history_path())
+        return self.__history
+
+    def extract_text(self, img, timer: CaptureTimer | None = None) -> str:
+        # extract text from image
+        return self.pipeline.run(img, timer)
 
+    def extract(self, img, timer: CaptureTimer | None = None) -> "str | WordBoxes":
+        # boxes of words are recognized only if they are copied
+        if self.__settings.clipboard_format == "text":
+            return self.extract_text(img, timer)
+        return self.pipeline.run_words(img, timer)
+
+    def __to_clip(self, result: "str | WordBoxes", timer: CaptureTimer, image=None,
+                  region: tuple[int, int, int, int] | None = None):
+        import pyperclip
+        if isinstance(result, str):
+            text = clip = result
+        else:
+            # words are copied in chosen format, history keeps plain text
+            with timer.span("format"):
+                text = result.to_text()
+                clip = result.format(self.__settings.clipboard_format)
+        # add text to clipboard
+        with timer.span("clipboard"):
+            pyperclip.copy(clip)
         # Notify user if notifications is enabled
         if self.__settings.is_notification_enabled:
-            ScreenShotNotification().show()
+            with timer.span("notification"):
+                ScreenShotNotification().show()
+        # image is needed only for key of saved screenshot
+        image = image if self.__settings.is_save_photos else None
+        self.__record((text, timer, image, region, self.languages, self.__settings.history_max_age))
+
+    def __record(self, item: tuple):
+        with self.__recorder_lock:
+            if self.__recorder is None:
+                self.__records = queue.Queue()
+                # not daemon, so queued results are written before exit of process
+                self.__recorder = threading.Thread(target=self.__write_records, name="capture-recorder")
+                self.__recorder.start()
+        self.__records.put(item)
+
+    def __stop_recorder(self):
+        with self.__recorder_lock:
+            recorder, self.__recorder = self.__recorder, None
+        if recorder is not None:
+            self.__records.put(None)
+            recorder.join()
+
+    def __write_records(self):
+        while True:
+            item = self.__records.get()
+            if item is None:
+                return
+            text, timer, image, region, languages, history_max_age = item
+            self.__add_history(text, timer, image, region, languages)
+            self.__clean_history(history_max_age)
+            try:
+                self.metrics.append(timer.to_record())
+            except OSError as ex:  # metrics are optional
+                logger.error("metrics of capture are not written: %s", ex)
 
-    def _event_loop(self):
-        keyboard.add_hotkey(self.__hotkey, self.screenshot_to_clip)
+    def __add_history(self, text: str, timer: CaptureTimer, image, region: tuple[int, int, int, int] | None,
+                      languages: str):
+        from apps.archive import ScreenshotArchive
+        # key is the same as name of image in archive, so saved image can be found by result
+        image_key = ScreenshotArchive.key(image) if image is not None else None
         try:
-            keyboard.wait()
+            self.history.add(text, languages, region, image_key, timer.started_at)
+        except Exception as ex:  # history is optional, text is already in clipboard
+            logger.error("result is not added to history: %s", ex)
+
+    def __clean_history(self, max_age: int):
+        # max_age in days, 0 is unlimited
+        now = time.time()
+        if not max_age or now - self.__history_cleaned_at < HISTORY_RETENTION_INTERVAL:
+            return
+        self.__history_cleaned_at = now
+        try:
+            deleted = self.history.delete_older(now - max_age * 24 * 3600)
+        except Exception as ex:
+            logger.error("old history is not deleted: %s", ex)
+            return
+        if deleted:
+            logger.info("%s captures older than %s days are deleted from history", deleted, max_age)
+
+    def __enqueue(self, overlay: "SnippingWidget"):
+        from apps.screenshot import ScreenShot
+        # hotkey path only captures, text is extracted by pool of workers
+        timer = CaptureTimer()
+        overlay.record_timings(timer)
+        screenshot_img = ScreenShot(image=overlay.last_screenshot)
+        # buffer is owned by job from now, overlay does not keep it until next capture
+        overlay.last_screenshot = None
+        with timer.span("to_array"):
+            img = screenshot_img.to_array()
+        if self.__settings.is_save_photos:
+            self.archive.submit(img)
+        self.__pool.submit(img, timer, {"region": overlay.last_region})
+
+    def __deliver(self, job: "OcrJob"):
+        # called by workers in capture order
+        if job.error is not None:
+            self.__bridge.failed.emit(job.error)
+            return
+        job.timer.add("queue", job.wait_ms)
+        self.__to_clip(job.text, job.timer, job.image, job.meta.get("region"))
+
+    def __on_failed(self, ex: Exception):
+        if _is_tesseract_not_found(ex):
+            show_wrong_msg(ex)
+            QApplication.quit()
+        else:
+            logger.error("text extraction is failed: %s", ex)
+
+    def __listen_config(self, receiver: Connection):
+        # changed settings and commands from tray process, they are applied in Qt thread
+        while True:
+            try:
+                kind, payload = receiver.recv()
+            except (EOFError, OSError):  # tray process is closed
+                break
+            if kind == "pressed":
+                # standby does not get presses, tray sends them only to active event loop
+                self.__bridge.pressed.emit(payload)
+            elif kind == "settings":
+                self.__bridge.configured.emit(payload)
+            elif kind == "watch":
+                self.__bridge.watch.emit(payload)
+            elif kind == "activate":
+                self.__bridge.activated.emit()
+
+    def __on_selected(self, overlay: "SnippingWidget"):
+        if self.__watch_options is None:
+            self.__enqueue(overlay)
+            return
+        options, self.__watch_options = self.__watch_options, None
+        if overlay.last_region is not None:
+            self.__start_watch(overlay.last_region, options)
+
+    def __on_watch(self, options: dict | None):
+        # selection of region is started, or watch is stopped if options is None
+        self.__stop_watch()
+        self.__watch_options = options
+        if options is not None:
+            self.__overlay.start()
+
+    def __start_watch(self, region: tuple[int, int, int, int], options: dict):
+        from apps.watch import RegionWatcher, append_to_file
+        import pyperclip
+        output = options.get("output")
+        emit = append_to_file(output) if output else pyperclip.copy
+        self.__watcher = RegionWatcher(region, self.extract_text, emit, options.get("interval", 1.0))
+        self.__watcher.start()
+        logger.info("region %s is watched, new text is emitted to %s", region, output or "clipboard")
+
+    def __stop_watch(self):
+        if self.__watcher is not None:
+            self.__watcher.stop(wait=False)
+            self.__watcher = None
+
+    def __on_settings_changed(self, snapshot: SettingsSnapshot, changed: set[str]):
+        logger.info("settings are updated: %s", ", ".join(sorted(changed)))
+
+        if PIPELINE_FIELDS & changed:
+            from apps.engine import engines
+            pipeline, self.__pipeline = self.__pipeline, None
+            if pipeline is not None:
+                pipeline.close()
+            # models of previous languages are not kept next to new ones
+            engines.close()
+            # models of new languages are loaded in background, overlay is not blocked
+            threading.Thread(target=self.__warm_up, daemon=True).start()
+        if ARCHIVE_FIELDS & changed and self.__archive is not None:
+            # queued screenshots are written to previous folder
+            archive, self.__archive = self.__archive, None
+            archive.close(wait=False)
+
+    def __warm_up(self):
+        # pipeline modules and language models are loaded once for each worker, before the first capture
+        self.pipeline.warm_up(self.__pool.workers)
+        self.__is_ready = True
+        mark_startup("ocr_ready")
+
+    def __activate(self):
+        # standby replaces failed event loop, presses of hotkey are sent to it from now
+        logger.info("standby event loop is activated")
+        mark_startup("hotkey_ready")
+        # supervisor sees activation without waiting for timer
+        self.__beat()
+
+    def __beat(self):
+        # heartbeat is sent by Qt thread, so it stops if the thread hangs
+        if self.__heartbeat_sender is None:
+            return
+        from apps.memory import rss_bytes
+        try:
+            self.__heartbeat_sender.send({"ready": self.__is_ready, "rss": rss_bytes(), "idle": self.__is_idle()})
+        except OSError:  # tray process is closed
+            QApplication.quit()
+
+    def __is_idle(self) -> bool:
+        stats = self.__pool.stats()
+        return not (stats["queued"] or stats["in_progress"] or stats["waiting_delivery"])
+
+    def __on_idle(self):
+        # buffers of captures are freed, their pages are returned to system between captures
+        from apps.memory import release_memory
+        release_memory()
+
+    def _event_loop(self, config_receiver: Connection | None = None, heartbeat_sender: Connection | None = None,
+                    is_active: bool = True):
+        from apps.memory import limit_arenas
+        from apps.screenshot import ScreenShot
+        from apps.workers import OcrWorkerPool
+        # threads of workers do not get own heap arenas, which keep freed buffers of captures
+        limit_arenas()
+        # Qt application and overlay live as long as process, hotkey only shows overlay
+        app = QApplication([])
+        app.setQuitOnLastWindowClosed(False)
+        overlay = self.__overlay = ScreenShot.get_overlay(self.__settings)
+        overlay.closed.connect(lambda: self.__on_selected(overlay))
+        overlay.shown.connect(lambda latency: logger.info("overlay is visible in %.1f ms after hotkey", latency))
+
+        self.__pool = OcrWorkerPool(self.extract, self.__deliver, self.__settings.ocr_workers, self.__on_idle)
+        self.__bridge = EventBridge()
+        self.__bridge.pressed.connect(overlay.start)
+        self.__bridge.activated.connect(self.__activate)
+        self.__bridge.failed.connect(self.__on_failed)
+        # settings are changed only in Qt thread, so subscribers are called in it
+        self.__bridge.configured.connect(self.__settings.apply)
+        self.__bridge.watch.connect(self.__on_watch)
+        self.__settings.subscribe(self.__on_settings_changed)
+        if config_receiver is not None:
+            threading.Thread(target=self.__listen_config, args=(config_receiver,), daemon=True).start()
+        self.__heartbeat_sender = heartbeat_sender
+        heartbeat = QTimer()
+        heartbeat.timeout.connect(self.__beat)
+        heartbeat.start(int(HEARTBEAT_INTERVAL * 1000))
+        self.__beat()
+        # hotkey works from now, capture made before models are loaded only waits for them in queue
+        if is_active:
+            mark_startup("hotkey_ready")
+        threading.Thread(target=self.__warm_up, daemon=True).start()
+        try:
+            app.exec_()
         # if process is terminate
         except KeyboardInterrupt:
             pass
+        self.__pool.close(wait=False)
+        self.__stop_watch()
+        if self.__archive is not None:
+            self.__archive.close()
+        self.__stop_recorder()
+        if self.__history is not None:
+            self.__history.close()
 
     def start_event_loop(self) -> Process:
+        if self.__active is None:
+            self.__active = self.__start_worker(is_active=True)
+        return self.__active.process
+
+    def start_standby(self) -> Process:
+        """
+        Starting event loop which loads models but does not get presses of hotkey, it replaces failed event loop
+        """
+        if self.__standby is None:
+            self.__standby = self.__start_worker(is_active=False)
+        return self.__standby.process
+
+    def stop_standby(self):
+        if self.__standby is not None:
+            self.__standby.stop()
+            self.__standby = None
+
+    def stop_event_loop(self):
+        if self.__active is not None:
+            self.__active.stop()
+            self.__active = None
+        self.stop_standby()
+        self.stop_hotkey_listener()
+
+    def start_hotkey_listener(self) -> Process:
+        if self.__listener is None:
+            self.__listener = HotkeyListener(self.__hotkey, self.__on_pressed, HEARTBEAT_INTERVAL)
+        return self.__listener.process
+
+    def stop_hotkey_listener(self):
+        if self.__listener is not None:
+            listener, self.__listener = self.__listener, None
+            listener.stop()
+            # hung process is killed in background, tray is not blocked
+            threading.Thread(target=listener.stop, args=(1.0,), name="hotkey-reaper", daemon=True).start()
+
+    def restart_hotkey_listener(self):
+        # listener is small, so new process is started instead of standby
+        self.stop_hotkey_listener()
+        self.start_hotkey_listener()
+
+    def __on_pressed(self, requested_at: float):
+        # called by reader thread of listener, press goes to event loop without waiting for Qt thread of tray
+        worker = self.__active
+        if worker is None or not worker.send("pressed", requested_at):
+            logger.warning("hotkey is pressed, but event loop is not running")
+
+    def restart_event_loop(self):
+        self.failover()
+
+    def failover(self) -> bool:
+        """
+        Replacing active event loop by standby one, new event loop is started if there is no standby
+        :return: True if standby is activated
+        """
+        failed, self.__active = self.__active, None
+        if failed is not None:
+            # termination does not wait, failover is called in Qt thread of tray
+            failed.stop()
+        standby, self.__standby = self.__standby, None
+        if standby is not None and standby.is_alive and standby.activate():
+            self.__active = standby
+        else:
+            if standby is not None:
+                standby.stop()
+            self.start_event_loop()
+        # hung process can ignore termination, it is waited (and killed) in background thread,
+        #   so tray is not blocked and replacement is already running
+        if failed is not None:
+            threading.Thread(target=failed.stop, args=(1.0,), name="event-loop-reaper", daemon=True).start()
+        return self.__active is standby
+
+    def poll_workers(self):
+        for worker in (self.__active, self.__standby):
+            if worker is not None:
+                worker.poll()
+
+    def __start_worker(self, is_active: bool) -> EventLoopWorker:
+        config_receiver, config_sender = Pipe(duplex=False)
+        heartbeat_receiver, heartbeat_sender = Pipe(duplex=False)
         process = Process(
             target=self._event_loop,
+            args=(config_receiver, heartbeat_sender, is_active)
         )
         process.start()
-        self.__event_loop_process = process
-        return process
+        # ends of pipes are used only by event loop process
+        config_receiver.close()
+        heartbeat_sender.close()
+        return EventLoopWorker(process, config_sender, heartbeat_receiver, is_active)
 
-    def stop_event_loop(self):
-        if self.__event_loop_process:
-            self.__event_loop_process.terminate()
-            self.__event_loop_process = None
+    def update_settings(self, **values):
+        """
+        Applying changed settings to running event loop in place, without restart of its process
+        :param values: fields of Settings and their new values, e.g. languages=["eng", "rus"]
+        """
+        self.__settings.apply(values)
+        if "hotkey" in values:
+            self.__hotkey = values["hotkey"]
+            if self.__listener is not None and not self.__listener.set_hotkey(self.__hotkey):
+                self.restart_hotkey_listener()
+        if not self.__send("settings", values):  # event loop is dead, it is started with new settings
+            self.restart_event_loop()
 
-    def restart_event_loop(self):
-        self.stop_event_loop()
-        self.start_event_loop()
+    def watch_region(self, output: str | None = None, interval: float = 1.0):
+        """
+        Selecting region which is captured periodically, text of its new lines is emitted
+        :param output: file where text is appended, clipboard is used if None
+        :param interval: seconds between captures
+        """
+        self.__send("watch", {"output": output, "interval": interval})
+
+    def stop_watch(self):
+        self.__send("watch", None)
+
+    def __send(self, kind: str, payload) -> bool:
+        # message to running event loop, False if it is not delivered
+        if self.__active is None:
+            return True
+        # standby follows settings, so it replaces active event loop without restart
+        if kind == "settings" and self.__standby is not None and not self.__standby.send(kind, payload):
+            self.stop_standby()
+        return self.__active.send(kind, payload)
 
     def update_hotkey(self, new_hotkey: str = __settings.hotkey, auto_restart: bool = False):
         self.__hotkey = new_hotkey
+        # hotkey is replaced in running listener
         if auto_restart:
-            self.restart_event_loop()
+            self.update_settings(hotkey=new_hotkey)
@@ -1,11 +1,15 @@
+from PyQt5.QtCore import QTimer
 from PyQt5.QtGui import QIcon
-from PyQt5.QtWidgets import QApplication, QSystemTrayIcon, QMenu, QAction, QFileDialog, QWidget, QLabel, QWidgetAction
-from pytesseract import get_languages
+from PyQt5.QtWidgets import (QApplication, QSystemTrayIcon, QMenu, QAction, QActionGroup, QFileDialog, QWidget, QLabel,
+                             QWidgetAction)
 
 from apps.languages import Languages
+from apps.tessinfo import get_languages
 from apps.textExtractor import TextExtractor
-from apps.utils import get_logo, get_default_save_folder, get_hotkey
-from apps.config import Settings, Theme, LogoTheme
+from apps.supervisor import Supervisor
+from apps.metrics import MetricsLog
+from apps.utils import get_logo, get_default_save_folder, get_hotkey, get_metrics_path
+from apps.config import CLIPBOARD_FORMATS, Settings, Theme, LogoTheme
 
 
 class TrayApp(QSystemTrayIcon):
@@ -17,10 +21,20 @@ class TrayApp(QSystemTrayIcon):
         self.__setup_ui()
         # create text extractor
         self.extractor = TextExtractor()
-        # start extractor
-        self.extractor.start_event_loop()
-        # TODO add autoreload for extractor if pc was slept and now is working
-        #  or just add auto check is extractor running each 5 or 10 secs
+        # extractor is replaced by warmed up standby if it dies, hangs or loses hotkey after sleep
+        self.supervisor = Supervisor(self.extractor, self.__settings, parent=self)
+        self.supervisor.replaced.connect(self.__on_replaced)
+        self.supervisor.failed.connect(self.__on_supervision_failed)
+        # start extractor when event loop of tray is running, so icon is shown before process is spawned
+        QTimer.singleShot(0, self.supervisor.start)
+
+    def __on_replaced(self, reason: str):
+        self.showMessage(self.__settings.title, f"Text extractor is restarted: {reason}",
+                         QSystemTrayIcon.Information)
+
+    def __on_supervision_failed(self, reason: str):
+        self.showMessage(self.__settings.title, f"Text extractor is stopped, restart the app: {reason}",
+                         QSystemTrayIcon.Critical)
 
     def __setup_ui(self):
         self.setToolTip(self.__settings.title)
@@ -33,6 +47,7 @@ class TrayApp(QSystemTrayIcon):
 
     def __set_menu(self):
         self.menu = QMenu()
+        self.menu.setToolTipsVisible(True)
         self.__set_style()
         self.__set_title_action()
         self.menu.addSeparator()
@@ -76,6 +91,14 @@ class TrayApp(QSystemTrayIcon):
         self.hotkey_action = QAction(f"HotKey {self.__settings.hotkey}", self)
         self.hotkey_action.triggered.connect(self.change_hotkey)
 
+        # action (search in history of extracted texts)
+        self.search_action = QAction("Search history", self)
+        self.search_action.triggered.connect(self.search_history)
+
+        # create menu of watch of region (periodic capture of selected region)
+        self.watch_menu = self.menu.addMenu("Watch region")
+        self.__add_actions_watch_menu()
+
         # action (Enable notifications/Disable notifications)
         self.notifications_action = QAction(
             "Disable notifications" if self.__settings.is_notification_enabled else "Enable notifications",
@@ -88,6 +111,14 @@ class TrayApp(QSystemTrayIcon):
             self)
         self.autostart_action.triggered.connect(self.toggle_autostart)
 
+        # action (Enable hot standby/Disable hot standby), trade-off is shown in tooltip
+        self.hot_standby_action = QAction(
+            "Disable hot standby" if self.__settings.is_hot_standby else "Enable hot standby",
+            self)
+        self.hot_standby_action.setToolTip("Standby process keeps OCR models loaded, so the hotkey works instantly "
+                                           "after the extractor fails. It costs the memory of a second process.")
+        self.hot_standby_action.triggered.connect(self.toggle_hot_standby)
+
         # action (don`t save screenshots/save screenshots)
         self.is_save_action = QAction(
             "don`t save screenshots" if self.__settings.is_save_photos else "save screenshots",
@@ -102,6 +133,10 @@ class TrayApp(QSystemTrayIcon):
         self.languages_menu = self.menu.addMenu("Languages")
         self.__set_lang_menu()
 
+        # create menu of format of copied text
+        self.format_menu = self.menu.addMenu("Clipboard format")
+        self.__add_actions_format_menu()
+
         # Create logo submenu items
         self.logo_menu = self.menu.addMenu("Logo")
         self.__add_actions_logo_menu()
@@ -110,6 +145,10 @@ class TrayApp(QSystemTrayIcon):
         self.theme_menu = self.menu.addMenu("Theme")
         self.__add_actions_theme_menu()
 
+        # create menu with latency summary of last captures
+        self.latency_menu = self.menu.addMenu("Latency")
+        self.latency_menu.aboutToShow.connect(self.__set_latency_menu)
+
         # create and set quit action
         self.action_quit = QAction("Quit", self)
         self.action_quit.triggered.connect(self.quit_application)
@@ -125,6 +164,27 @@ class TrayApp(QSystemTrayIcon):
                 logo_theme_action.setVisible(False)
             self.logo_menu.addAction(logo_theme_action)
 
+    def __add_actions_format_menu(self):
+        format_group = QActionGroup(self)
+        for clipboard_format in CLIPBOARD_FORMATS:
+            format_action = QAction({"text": "Text", "hocr": "hOCR"}.get(clipboard_format, clipboard_format.upper()),
+                                    self)
+            format_action.setData(clipboard_format)
+            format_action.setCheckable(True)
+            format_action.setChecked(clipboard_format == self.__settings.clipboard_format)
+            format_action.triggered.connect(self.select_clipboard_format)
+            format_group.addAction(format_action)
+            self.format_menu.addAction(format_action)
+
+    def __add_actions_watch_menu(self):
+        watch_clipboard_action = QAction("To clipboard", self)
+        watch_clipboard_action.triggered.connect(self.watch_to_clipboard)
+        watch_file_action = QAction("To file...", self)
+        watch_file_action.triggered.connect(self.watch_to_file)
+        stop_watch_action = QAction("Stop watching", self)
+        stop_watch_action.triggered.connect(self.stop_watch)
+        self.watch_menu.addActions([watch_clipboard_action, watch_file_action, stop_watch_action])
+
     def __set_action_save_folder(self):
         self.save_folder_action = QAction("Save Folder")
         self.save_folder_action.triggered.connect(self.select_folder)
@@ -149,28 +209,46 @@ class TrayApp(QSystemTrayIcon):
                 # add to menu
                 self.languages_menu.addAction(lang_action)
 
+    def __set_latency_menu(self):
+        # metrics are written by extractor process, so they are read on each opening of menu
+        self.latency_menu.clear()
+        for line in MetricsLog(get_metrics_path()).format_summary():
+            line_action = QAction(line, self)
+            line_action.setEnabled(False)
+            self.latency_menu.addAction(line_action)
+
     def __set_items_menu(self):
         if hasattr(self, "save_folder_action"):
             self.menu.addActions([
                 self.hotkey_action,
+                self.search_action,
+                self.watch_menu.menuAction(),
                 self.notifications_action,
                 self.autostart_action,
+                self.hot_standby_action,
                 self.is_save_action,
                 self.save_folder_action,
                 self.languages_menu.menuAction(),
+                self.format_menu.menuAction(),
                 self.logo_menu.menuAction(),
                 self.theme_menu.menuAction(),
+                self.latency_menu.menuAction(),
                 self.action_quit
             ])
         else:
             self.menu.addActions([
                 self.hotkey_action,
+                self.search_action,
+                self.watch_menu.menuAction(),
                 self.notifications_action,
                 self.autostart_action,
+                self.hot_standby_action,
                 self.is_save_action,
                 self.languages_menu.menuAction(),
+                self.format_menu.menuAction(),
                 self.logo_menu.menuAction(),
                 self.theme_menu.menuAction(),
+                self.latency_menu.menuAction(),
                 self.action_quit
             ])
 
@@ -250,6 +328,7 @@ class TrayApp(QSystemTrayIcon):
     def select_folder(self):
         save_dir = QFileDialog.getExistingDirectory(QWidget(), "select directory", get_default_save_folder())
         self.__settings.set_values(save_folder=save_dir if len(save_dir) > 0 else self.__settings.save_folder)
+        self.extractor.update_settings(save_folder=self.__settings.save_folder)
 
     def select_languages(self):
         lang: Languages = Languages.get_item_by_name(
@@ -265,7 +344,7 @@ class TrayApp(QSystemTrayIcon):
             self.__settings.set_values(
                 languages=self.__settings.languages
             )
-        self.extractor.restart_event_loop()
+        self.extractor.update_settings(languages=self.__settings.languages)
         self.__set_lang_menu()
 
     def toggle_notifications(self):
@@ -274,11 +353,21 @@ class TrayApp(QSystemTrayIcon):
         else:
             self.sender().setText("Disable notifications")
 
-        self.extractor.restart_event_loop()
-
         self.__settings.set_values(
             is_notification_enabled=not self.__settings.is_notification_enabled
         )
+        self.extractor.update_settings(is_notification_enabled=self.__settings.is_notification_enabled)
+
+    def toggle_hot_standby(self):
+        if self.__settings.is_hot_standby:
+            self.sender().setText("Enable hot standby")
+        else:
+            self.sender().setText("Disable hot standby")
+
+        # supervisor starts or stops standby on its next check
+        self.__settings.set_values(
+            is_hot_standby=not self.__settings.is_hot_standby
+        )
 
     def toggle_autostart(self):
         is_auto_started = self.__settings.is_auto_started()
@@ -302,11 +391,10 @@ class TrayApp(QSystemTrayIcon):
             # self.menu.addAction(self.save_folder_action)
             self.__set_items_menu()
 
-        self.extractor.restart_event_loop()
-
         self.__settings.set_values(
             is_save_photos=not self.__settings.is_save_photos
         )
+        self.extractor.update_settings(is_save_photos=self.__settings.is_save_photos)
 
     def toggle_logo_theme(self):
         # get selected theme
@@ -336,8 +424,34 @@ class TrayApp(QSystemTrayIcon):
         self.__set_lang_menu()
         self.title_action.setIcon(self.icon())
 
+    def watch_to_clipboard(self):
+        self.extractor.watch_region()
+
+    def select_clipboard_format(self):
+        self.__settings.set_values(clipboard_format=self.sender().data())
+        self.extractor.update_settings(clipboard_format=self.__settings.clipboard_format)
+
+    def stop_watch(self):
+        self.extractor.stop_watch()
+
+    def watch_to_file(self):
+        path, _ = QFileDialog.getSaveFileName(QWidget(), "append text to file", get_default_save_folder(),
+                                              "Text files (*.txt);;All files (*)")
+        if path:
+            self.extractor.watch_region(path)
+
+    def search_history(self):
+        # dialog is created once and kept, so last query stays
+        if not hasattr(self, "search_dialog"):
+            from apps.search import HistorySearchDialog
+            self.search_dialog = HistorySearchDialog(self.__settings)
+        self.search_dialog.show()
+        self.search_dialog.raise_()
+        self.search_dialog.activateWindow()
+
     def quit_application(self):
-        # stop event loop for extractor
+        # stop event loop for extractor, it must not be replaced while it is stopped
+        self.supervisor.stop()
         self.extractor.stop_event_loop()
         # stop app
         QApplication.quit()
@@ -1,7 +1,6 @@
-from apps.config import Settings, LogoTheme, Theme
+from apps.config import get_settings, LogoTheme, Theme
 import os.path
 import darkdetect
-import keyboard
 
 get_theme = darkdetect.theme
 is_dark = darkdetect.isDark
@@ -17,9 +16,26 @@ def get_default_save_folder():
     return os.path.join(get_main_dir(), screenshot_path)
 
 
+def get_cache_folder():
+    return os.path.join(get_main_dir(), "cache")
+
+
+def get_metrics_path():
+    return os.path.join(get_main_dir(), "metrics.jsonl")
+
+
+def get_history_path():
+    return os.path.join(get_main_dir(), "history.sqlite3")
+
+
+def get_daemon_token_path():
+    # in home of user, not in app folder, so other accounts of computer can not read it
+    return os.path.join(os.path.expanduser("~"), ".text_extractor_daemon_token")
+
+
 def get_logo():
     # get settings
-    __settings = Settings()
+    __settings = get_settings()
     # get main directory
     main_dir = get_main_dir()
     # choose them for logo
@@ -35,6 +51,8 @@ def get_logo():
 
 
 def get_hotkey():
+    # keyboard hook is needed only while new hotkey is recorded
+    import keyboard
     hotkey = []
     while True:
         try:
@@ -0,0 +1,121 @@
+# Watch of screen region
+#   region is captured periodically, identical frame is detected by one comparison with previous frame,
+#   changed frame is split into text lines and only lines with new pixels are recognized
+#   text of new lines is emitted, e.g. to clipboard or append only file
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+import numpy as np
+from apps.blocks import split_lines
+from apps.capture import create_backend
+from apps.preprocess import grayscale
+
+logger = logging.getLogger(__name__)
+
+
+class RegionWatcher:
+    def __init__(self, region: tuple[int, int, int, int], extract: Callable[[np.ndarray], str],
+                 emit: Callable[[str], None], interval: float = 1.0, known_lines: int = 2048):
+        """
+        :param region: (left, top, width, height) in physical pixels of screen
+        :param extract: function of extraction text from image of one line, called in thread of watcher
+        :param emit: function called with text of new or changed lines
+        :param interval: seconds between captures
+        :param known_lines: count of recognized lines which are kept, scrolled lines are not recognized again
+        """
+        self.region = region
+        self.interval = interval
+        self.known_lines = known_lines
+        self.margin = 6
+        self.__extract = extract
+        self.__emit = emit
+        self.__previous: np.ndarray | None = None
+        self.__previous_keys: set[str] = set()
+        # pixels hash of line -> text, LRU
+        self.__texts: OrderedDict[str, str] = OrderedDict()
+        self.__stop = threading.Event()
+        self.__thread: threading.Thread | None = None
+
+        # stats
+        self.frames = 0
+        self.unchanged_frames = 0
+        self.recognized_lines = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def start(self):
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self.__run, name="region-watcher", daemon=True)
+        self.__thread.start()
+
+    def stop(self, wait: bool = True):
+        self.__stop.set()
+        if wait and self.__thread is not None and self.__thread is not threading.current_thread():
+            self.__thread.join()
+
+    def process(self, frame: np.ndarray) -> str | None:
+        """
+        Comparing frame with previous one and recognizing new lines
+        :return: text of new lines or None if there is nothing new
+        """
+        self.frames += 1
+        previous, self.__previous = self.__previous, frame
+        if previous is not None and previous.shape == frame.shape and np.array_equal(previous, frame):
+            self.unchanged_frames += 1
+            return None
+
+        gray = grayscale(frame)
+        keys, new_lines = [], []
+        for rows in split_lines(gray):
+            # line is identified by its rows with ink, so position in frame does not matter
+            line = np.ascontiguousarray(gray[rows])
+            key = hashlib.blake2b(line.data, digest_size=16).hexdigest() + str(line.shape)
+            keys.append(key)
+            text = self.__texts.get(key)
+            if text is None:
+                # tesseract needs margin around text
+                text = self.__extract(gray[max(0, rows.start - self.margin):rows.stop + self.margin]).strip()
+                self.recognized_lines += 1
+                self.__texts[key] = text
+            self.__texts.move_to_end(key)
+            # line which has been in previous frame is not new, even if it is moved by scroll
+            if key not in self.__previous_keys and text:
+                new_lines.append(text)
+        while len(self.__texts) > self.known_lines:
+            self.__texts.popitem(last=False)
+        self.__previous_keys = set(keys)
+        return "\n".join(new_lines) if new_lines else None
+
+    def stats(self) -> dict:
+        return {"frames": self.frames, "unchanged_frames": self.unchanged_frames,
+                "recognized_lines": self.recognized_lines}
+
+    def __run(self):
+        # capture handle is used only by thread which created it
+        backend = create_backend()
+        try:
+            while not self.__stop.is_set():
+                started_at = time.perf_counter()
+                try:
+                    text = self.process(backend.grab(*self.region))
+                    if text is not None:
+                        self.__emit(text)
+                except Exception as ex:  # e.g. region is out of screen after change of monitors
+                    logger.error("watch of region is failed: %s", ex)
+                self.__stop.wait(max(0.0, self.interval - (time.perf_counter() - started_at)))
+        finally:
+            backend.close()
+            logger.info("watch of region is stopped, %s", self.stats())
+
+
+def append_to_file(path: str) -> Callable[[str], None]:
+    # emit function which appends text to file
+    def emit(text: str):
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(text + "\n")
+    return emit
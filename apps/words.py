@@ -0,0 +1,172 @@
+# Word level result of OCR
+#   WordBoxes keeps columns in NumPy arrays and all words in one string,
+#   so capture of full page with thousands of words does not create object for each word
+#   it is parsed from TSV of tesseract and formatted as text, JSON, TSV or hOCR
+import html
+import json
+import numpy as np
+from apps.config import CLIPBOARD_FORMATS as FORMATS
+
+TSV_HEADER = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext"
+# level of words in TSV of tesseract
+WORD_LEVEL = "5"
+
+
+class WordBoxes:
+    def __init__(self, words: list[str], boxes: np.ndarray, layout: np.ndarray, conf: np.ndarray):
+        """
+        :param words: texts of words
+        :param boxes: int32 array n x 4 of left, top, width, height
+        :param layout: int32 array n x 3 of block, paragraph and line numbers
+        :param conf: float32 array n of confidences 0..100
+        """
+        self.__text = "".join(words)
+        self.offsets = np.zeros(len(words) + 1, np.int32)
+        np.cumsum([len(word) for word in words], out=self.offsets[1:])
+        self.boxes = np.asarray(boxes, np.int32).reshape(-1, 4)
+        self.layout = np.asarray(layout, np.int32).reshape(-1, 3)
+        self.conf = np.asarray(conf, np.float32).reshape(-1)
+
+    @classmethod
+    def empty(cls):
+        return cls([], np.empty((0, 4)), np.empty((0, 3)), np.empty(0))
+
+    @classmethod
+    def from_tsv(cls, tsv: str):
+        # rows of other levels (page, block, paragraph, line) and empty words are skipped
+        words, numbers = [], []
+        for row in tsv.splitlines():
+            columns = row.split("\t", 11)
+            if len(columns) < 12 or columns[0] != WORD_LEVEL or not columns[11].strip():
+                continue
+            words.append(columns[11])
+            numbers.append(columns[2:5] + columns[6:11])
+        if not words:
+            return cls.empty()
+        numbers = np.array(numbers, np.float32)
+        return cls(words, numbers[:, 3:7], numbers[:, 0:3], numbers[:, 7])
+
+    @classmethod
+    def join(cls, parts: list["WordBoxes"]):
+        # words of parts one after another, boxes and layout are not changed
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return cls.empty()
+        return cls([word for part in parts for word in part.words()], np.concatenate([part.boxes for part in parts]),
+                   np.concatenate([part.layout for part in parts]), np.concatenate([part.conf for part in parts]))
+
+    @classmethod
+    def concat(cls, parts: list["WordBoxes"], origins: list[tuple[int, int]]):
+        """
+        Joining results of blocks of one image
+        :param origins: (left, top) of each block in image
+        """
+        moved = []
+        block_offset = 0
+        for part, (left, top) in zip(parts, origins):
+            part = part.shifted(left, top)
+            # block numbers stay unique in joined result
+            part.layout[:, 0] += block_offset
+            moved.append(part)
+            if len(part):
+                block_offset = int(part.layout[:, 0].max())
+        return cls.join(moved)
+
+    def take(self, indexes) -> "WordBoxes":
+        # words by indexes
+        return WordBoxes([self.word(index) for index in indexes], self.boxes[indexes], self.layout[indexes],
+                         self.conf[indexes])
+
+    def shifted(self, left: int, top: int) -> "WordBoxes":
+        # copy with boxes moved by offset, e.g. from coordinates of crop to coordinates of image
+        return WordBoxes(self.words(), self.boxes + np.array([left, top, 0, 0], np.int32), self.layout.copy(),
+                         self.conf)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def word(self, index: int) -> str:
+        return self.__text[self.offsets[index]:self.offsets[index + 1]]
+
+    def words(self) -> list[str]:
+        return [self.word(index) for index in range(len(self))]
+
+    def nbytes(self) -> int:
+        # memory of arrays and text
+        return self.offsets.nbytes + self.boxes.nbytes + self.layout.nbytes + self.conf.nbytes + len(self.__text)
+
+    def lines(self) -> list[tuple[int, np.ndarray]]:
+        # (paragraph key, indexes of words) of each line, in order of recognition
+        if not len(self):
+            return []
+        layout = self.layout.astype(np.int64)
+        keys = layout[:, 0] << 40 | layout[:, 1] << 20 | layout[:, 2]
+        starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+        ends = np.append(starts[1:], len(self))
+        return [(int(keys[start] >> 20), np.arange(start, end)) for start, end in zip(starts, ends)]
+
+    def to_text(self) -> str:
+        # words of line are joined by space, paragraphs are separated by empty line
+        lines, previous = [], None
+        for paragraph, indexes in self.lines():
+            if previous is not None and paragraph != previous:
+                lines.append("")
+            lines.append(" ".join(self.word(index) for index in indexes))
+            previous = paragraph
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def to_tsv(self) -> str:
+        rows = [TSV_HEADER]
+        for _, indexes in self.lines():
+            for word_number, index in enumerate(indexes, 1):
+                block, paragraph, line = self.layout[index].tolist()
+                left, top, width, height = self.boxes[index].tolist()
+                rows.append(f"{WORD_LEVEL}\t1\t{block}\t{paragraph}\t{line}\t{word_number}\t{left}\t{top}\t"
+                            f"{width}\t{height}\t{self.conf[index]:.2f}\t{self.word(index)}")
+        return "\n".join(rows) + "\n"
+
+    def to_json(self) -> str:
+        words = [
+            {"text": self.word(index), "left": left, "top": top, "width": width, "height": height,
+             "conf": round(conf, 2), "block": block, "par": paragraph, "line": line}
+            for index, ((left, top, width, height), (block, paragraph, line), conf)
+            in enumerate(zip(self.boxes.tolist(), self.layout.tolist(), self.conf.tolist()))
+        ]
+        return json.dumps({"words": words}, ensure_ascii=False)
+
+    def to_hocr(self) -> str:
+        body = []
+        previous = None
+        paragraph_number = 0
+        for line_number, (paragraph, indexes) in enumerate(self.lines(), 1):
+            if paragraph != previous:
+                if previous is not None:
+                    body.append("   </p>")
+                paragraph_number += 1
+                body.append(f"   <p class='ocr_par' id='par_{paragraph_number}'>")
+                previous = paragraph
+            body.append(f"    <span class='ocr_line' id='line_{line_number}' title='{self.__bbox(indexes)}'>")
+            for index in indexes:
+                body.append(f"     <span class='ocrx_word' id='word_{index + 1}' "
+                            f"title='{self.__bbox([index])}; x_wconf {int(self.conf[index])}'>"
+                            f"{html.escape(self.word(index))}</span>")
+            body.append("    </span>")
+        if previous is not None:
+            body.append("   </p>")
+        return ("<?xml version='1.0' encoding='UTF-8'?>\n"
+                "<html xmlns='http://www.w3.org/1999/xhtml'>\n"
+                " <head><meta name='ocr-system' content='tesseract'/>"
+                "<meta name='ocr-capabilities' content='ocr_page ocr_par ocr_line ocrx_word'/></head>\n"
+                " <body>\n  <div class='ocr_page' id='page_1'>\n" + "\n".join(body) +
+                "\n  </div>\n </body>\n</html>\n")
+
+    def format(self, output_format: str) -> str:
+        if output_format not in FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}")
+        return getattr(self, f"to_{output_format}")()
+
+    def __bbox(self, indexes) -> str:
+        boxes = self.boxes[indexes]
+        left, top = boxes[:, 0].min(), boxes[:, 1].min()
+        right, bottom = (boxes[:, 0] + boxes[:, 2]).max(), (boxes[:, 1] + boxes[:, 3]).max()
+        return f"bbox {left} {top} {right} {bottom}"
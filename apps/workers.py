@@ -0,0 +1,162 @@
+# Pool of OCR workers
+#   hotkey path only submits captured images, workers extract text in parallel
+#   and results are delivered in capture order
+import logging
+import queue
+import threading
+import time
+from typing import Callable
+import numpy as np
+from apps.metrics import CaptureTimer
+
+logger = logging.getLogger(__name__)
+
+
+class OcrJob:
+    def __init__(self, sequence: int, image: np.ndarray, timer: CaptureTimer | None = None,
+                 meta: dict | None = None):
+        self.sequence = sequence
+        self.image: np.ndarray | None = image
+        # spans of stages of this capture
+        self.timer = timer or CaptureTimer()
+        # data of capture for deliver function, e.g. region of screen
+        self.meta = meta or {}
+        # result of extract function, e.g. text
+        self.text = None
+        self.error: Exception | None = None
+        # timings from time.perf_counter()
+        self.submitted_at = time.perf_counter()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+
+    @property
+    def wait_ms(self) -> float:
+        return (self.started_at - self.submitted_at) * 1000
+
+    @property
+    def ocr_ms(self) -> float:
+        return (self.finished_at - self.started_at) * 1000
+
+    @property
+    def latency_ms(self) -> float:
+        return (self.finished_at - self.submitted_at) * 1000
+
+    def __str__(self):
+        return (f"OcrJob(sequence={self.sequence}, wait={self.wait_ms:.1f}ms, "
+                f"ocr={self.ocr_ms:.1f}ms, latency={self.latency_ms:.1f}ms)")
+
+
+class OcrWorkerPool:
+    def __init__(self, extract: Callable[[np.ndarray, CaptureTimer], object], deliver: Callable[[OcrJob], None],
+                 workers: int = 2, on_idle: Callable[[], None] | None = None):
+        """
+        :param extract: function of extraction text from image and timer of job, called in worker thread
+        :param deliver: function called with finished jobs strictly in order of submit
+        :param workers: count of worker threads
+        :param on_idle: function called when the last job is delivered and its image is released
+        """
+        self.__extract = extract
+        self.__deliver = deliver
+        self.__on_idle = on_idle
+        self.__queue: queue.Queue[OcrJob | None] = queue.Queue()
+
+        # ordered delivery
+        self.__lock = threading.Lock()
+        self.__delivery_lock = threading.Lock()
+        self.__next_sequence = 0
+        self.__next_delivery = 0
+        self.__finished: dict[int, OcrJob] = {}
+
+        # stats
+        self.__in_progress = 0
+        self.__done = 0
+        self.__last_latency_ms: float | None = None
+
+        self.__threads = [
+            threading.Thread(target=self.__work, name=f"ocr-worker-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for thread in self.__threads:
+            thread.start()
+
+    @property
+    def workers(self) -> int:
+        return len(self.__threads)
+
+    @property
+    def depth(self) -> int:
+        # jobs which are waiting for worker or are in progress
+        with self.__lock:
+            return self.__queue.qsize() + self.__in_progress
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {
+                "workers": len(self.__threads),
+                "queued": self.__queue.qsize(),
+                "in_progress": self.__in_progress,
+                "waiting_delivery": len(self.__finished),
+                "done": self.__done,
+                "last_latency_ms": self.__last_latency_ms,
+            }
+
+    def submit(self, image: np.ndarray, timer: CaptureTimer | None = None, meta: dict | None = None) -> OcrJob:
+        with self.__lock:
+            job = OcrJob(self.__next_sequence, image, timer, meta)
+            self.__next_sequence += 1
+        self.__queue.put(job)
+        logger.debug("job %s is queued, depth %s", job.sequence, self.depth)
+        return job
+
+    def close(self, wait: bool = True):
+        for _ in self.__threads:
+            self.__queue.put(None)
+        if wait:
+            for thread in self.__threads:
+                thread.join()
+
+    def __work(self):
+        while True:
+            job = self.__queue.get()
+            if job is None:
+                break
+            with self.__lock:
+                self.__in_progress += 1
+            job.started_at = time.perf_counter()
+            try:
+                job.text = self.__extract(job.image, job.timer)
+            except Exception as ex:  # delivered to user with job
+                job.error = ex
+            job.finished_at = time.perf_counter()
+            self.__finish(job)
+
+    def __finish(self, job: OcrJob):
+        # only one thread delivers at a time, so other worker can not overtake jobs in delivery
+        with self.__delivery_lock:
+            with self.__lock:
+                self.__in_progress -= 1
+                self.__finished[job.sequence] = job
+                # collect jobs which can be delivered in capture order
+                ready = []
+                while self.__next_delivery in self.__finished:
+                    ready.append(self.__finished.pop(self.__next_delivery))
+                    self.__next_delivery += 1
+                self.__done += len(ready)
+                if ready:
+                    self.__last_latency_ms = ready[-1].latency_ms
+                depth = self.__queue.qsize() + self.__in_progress
+
+            for ready_job in ready:
+                logger.info("%s, depth %s", ready_job, depth)
+                try:
+                    self.__deliver(ready_job)
+                except Exception:
+                    logger.exception("delivery of job %s is failed", ready_job.sequence)
+                # image is not needed anymore
+                ready_job.image = None
+
+        if self.__on_idle is not None and self.depth == 0:
+            try:
+                self.__on_idle()
+            except Exception:
+                logger.exception("idle callback is failed")
@@ -0,0 +1,28 @@
+# Accuracy of recognized text
+import numpy as np
+
+
+def edit_distance(reference: str, hypothesis: str) -> int:
+    # Levenshtein distance, one row of matrix at a time
+    previous = np.arange(len(hypothesis) + 1)
+    hypothesis_chars = np.array(list(hypothesis)) if hypothesis else np.array([], dtype="<U1")
+    for i, char in enumerate(reference, 1):
+        substitution = previous[:-1] + (hypothesis_chars != char)
+        current = np.empty_like(previous)
+        current[0] = i
+        current[1:] = np.minimum(previous[1:] + 1, substitution)
+        # insertions depend on previous cell of the same row
+        current = np.minimum.accumulate(current - np.arange(len(current))) + np.arange(len(current))
+        previous = current
+    return int(previous[-1])
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def char_error_rate(reference: str, hypothesis: str) -> float:
+    reference, hypothesis = normalize(reference), normalize(hypothesis)
+    if not reference:
+        return float(bool(hypothesis))
+    return edit_distance(reference, hypothesis) / len(reference)
@@ -0,0 +1,33 @@
+# Latency of large captures: single image_to_string call against blocks in parallel
+#   python -m benchmarks.block_parallel [iterations] [languages]
+import statistics
+import sys
+import time
+from apps.blocks import split_blocks
+from apps.pipeline import ExtractionPipeline
+from benchmarks.synthetic import render_page
+
+
+def measure(pipeline: ExtractionPipeline, image, iterations: int) -> float:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        pipeline.run(image)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main(iterations: int = 3, languages: str = "eng"):
+    for columns in (1, 2):
+        image = render_page(lines=70, columns=columns)
+        single = measure(ExtractionPipeline(languages, block_parallel=False), image, iterations)
+        pipeline = ExtractionPipeline(languages, block_parallel=True)
+        blocks = len(split_blocks(image, pipeline.max_blocks))
+        parallel = measure(pipeline, image, iterations)
+        pipeline.close()
+        print(f"{image.shape[1]}x{image.shape[0]} columns={columns}: single={single:8.1f}ms  "
+              f"blocks({blocks})={parallel:8.1f}ms  speedup={single / parallel:4.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3, *sys.argv[2:3])
@@ -0,0 +1,41 @@
+# Latency of region capture: persistent mss handle against PIL.ImageGrab
+#   python -m benchmarks.capture [iterations]
+#   both backends return NumPy array which is passed to OCR, so conversion is included in timing
+import statistics
+import sys
+import time
+from apps.capture import MssBackend, PillowBackend, mss
+
+REGIONS = {
+    "word": (100, 100, 200, 40),
+    "paragraph": (100, 100, 800, 300),
+    "screen": (0, 0, 1920, 1080),
+}
+
+
+def measure(backend, region: tuple[int, int, int, int], iterations: int) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        backend.grab(*region)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main(iterations: int = 30):
+    backends = [PillowBackend()]
+    if mss is not None:
+        backends.append(MssBackend())
+    else:
+        print("mss is not installed, only Pillow is measured")
+    for name, region in REGIONS.items():
+        for backend in backends:
+            timings = measure(backend, region, iterations)
+            print(f"{name:<10} {backend.name:<7} p50={statistics.median(timings):7.1f}ms  "
+                  f"max={max(timings):7.1f}ms")
+    for backend in backends:
+        backend.close()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
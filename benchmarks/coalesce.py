@@ -0,0 +1,47 @@
+# Throughput of small crops: one OCR call for each crop against coalesced composites
+#   python -m benchmarks.coalesce [crops] [max_batch]
+#   crops are short fields of 1-3 words in light and dark theme, accuracy shows that splitting keeps texts apart
+import statistics
+import sys
+import time
+from apps.coalesce import CoalescingScheduler
+from apps.pipeline import ExtractionPipeline
+from apps.preprocess import Preprocessor
+from benchmarks.accuracy import char_error_rate
+from benchmarks.synthetic import random_lines, render_lines
+
+
+def make_crops(count: int) -> tuple[list, list[str]]:
+    texts, crops = [], []
+    for index in range(count):
+        text = random_lines(1, words=1 + index % 3, seed=index)[0]
+        texts.append(text)
+        crops.append(render_lines([text], width=60 + 110 * (1 + index % 3), dark=index % 4 == 0))
+    return crops, texts
+
+
+def report(name: str, elapsed: float, count: int, texts: list[str], results: list[str]):
+    error = statistics.mean(char_error_rate(text, result) for text, result in zip(texts, results))
+    print(f"{name:<10} {count / elapsed:7.1f} crops/s  {elapsed * 1000 / count:7.1f}ms per crop  CER={error:.3f}")
+
+
+def main(count: int = 200, max_batch: int = 64):
+    crops, texts = make_crops(count)
+    pipeline = ExtractionPipeline("eng", block_parallel=False, preprocessor=Preprocessor.from_profile("screen"),
+                                  script_detection=False)
+    pipeline.warm_up()
+
+    start = time.perf_counter()
+    results = [pipeline.run(crop) for crop in crops]
+    report("separate", time.perf_counter() - start, count, texts, results)
+
+    scheduler = CoalescingScheduler(pipeline, max_batch=max_batch)
+    start = time.perf_counter()
+    results = scheduler.recognize_many(crops)
+    report("coalesced", time.perf_counter() - start, count, texts, results)
+    print(f"coalesced  {scheduler.stats()}")
+    scheduler.close()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:3]))
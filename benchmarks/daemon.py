@@ -0,0 +1,78 @@
+# Load test of local OCR daemon: concurrent clients against tesseract CLI called for each image
+#   python -m benchmarks.daemon [requests] [clients] [workers]
+#   daemon is started in this process on free port, clients send PNG images over HTTP
+import io
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import PIL.Image
+import pytesseract
+from apps.daemon import DaemonClient, OcrDaemon
+from apps.pipeline import ExtractionPipeline
+from benchmarks.synthetic import random_lines, render_lines
+
+
+def make_images(count: int) -> list[bytes]:
+    images = []
+    for index in range(count):
+        buffer = io.BytesIO()
+        PIL.Image.fromarray(render_lines(random_lines(3, seed=index))).convert("RGB").save(buffer, "PNG")
+        images.append(buffer.getvalue())
+    return images
+
+
+def report(name: str, timings: list[float], elapsed: float, errors: int = 0):
+    timings = sorted(timings) or [0.0]
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{name:<8} {len(timings) / elapsed:7.1f} images/s  p50={statistics.median(timings):8.1f}ms  "
+          f"p95={p95:8.1f}ms  errors={errors}")
+
+
+def run_cold(images: list[bytes]):
+    # what other scripts do without daemon: tesseract process for each image
+    timings = []
+    start = time.perf_counter()
+    for data in images:
+        begin = time.perf_counter()
+        pytesseract.image_to_string(PIL.Image.open(io.BytesIO(data)))
+        timings.append((time.perf_counter() - begin) * 1000)
+    report("cold cli", timings, time.perf_counter() - start)
+
+
+def run_daemon(images: list[bytes], clients: int, workers: int):
+    daemon = OcrDaemon(ExtractionPipeline("eng", block_parallel=False), workers, max_pending=clients, port=0)
+    start = time.perf_counter()
+    daemon.warm_up()
+    print(f"daemon   warm up {(time.perf_counter() - start) * 1000:.0f}ms, {workers} workers, {clients} clients")
+    daemon.start()
+    client = DaemonClient(*daemon.address, token=daemon.token)
+
+    def send(data: bytes) -> float | None:
+        begin = time.perf_counter()
+        try:
+            client.ocr(data)
+        except RuntimeError:  # rejected or failed
+            return None
+        return (time.perf_counter() - begin) * 1000
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(clients) as executor:
+            results = list(executor.map(send, images))
+        elapsed = time.perf_counter() - start
+        timings = [ms for ms in results if ms is not None]
+        report("daemon", timings, elapsed, len(results) - len(timings))
+        print(f"daemon   stats {client.stats()}")
+    finally:
+        daemon.close()
+
+
+def main(requests: int = 100, clients: int = 8, workers: int = 2):
+    images = make_images(requests)
+    run_cold(images[:min(requests, 20)])
+    run_daemon(images, clients, workers)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:4]))
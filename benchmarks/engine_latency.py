@@ -0,0 +1,41 @@
+# Latency of warm in-process engine against tesseract CLI per call
+#   python -m benchmarks.engine_latency [iterations] [languages]
+import statistics
+import sys
+import time
+import numpy as np
+from apps.engine import CliEngine, WarmEngine, tesserocr
+from benchmarks.synthetic import render_text
+
+
+def measure(engine, image: np.ndarray, iterations: int) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        engine.image_to_string(image)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, timings: list[float]):
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{name:<6} mean={statistics.mean(timings):8.1f}ms  p50={statistics.median(timings):8.1f}ms  "
+          f"p95={p95:8.1f}ms")
+
+
+def main(iterations: int = 20, languages: str = "eng+osd"):
+    image = render_text()
+    report("cli", measure(CliEngine(languages), image, iterations))
+    if tesserocr is None:
+        print("warm   skipped, tesserocr is not installed")
+        return
+    start = time.perf_counter()
+    engine = WarmEngine(languages)
+    print(f"warm   model loading {(time.perf_counter() - start) * 1000:.1f}ms (once per language set)")
+    report("warm", measure(engine, image, iterations))
+    engine.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20, *sys.argv[2:3])
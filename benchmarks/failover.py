@@ -0,0 +1,46 @@
+# Time until hotkey works again: cold start of event loop against activation of warmed up standby
+#   python -m benchmarks.failover [rounds]
+#   event loop is ready when its heartbeat reports loaded models, processes are started like tray starts them
+import statistics
+import sys
+import time
+from PyQt5.QtWidgets import QApplication
+from apps.textExtractor import EventLoopWorker, TextExtractor
+
+
+def wait_ready(app: QApplication, extractor: TextExtractor, worker: EventLoopWorker, after: float,
+               timeout: float = 120.0) -> float:
+    # ms from after to first heartbeat after it which reports loaded models
+    deadline = after + timeout
+    while time.monotonic() < deadline:
+        app.processEvents()
+        beat = worker.last_beat
+        extractor.poll_workers()
+        if worker.last_beat != beat and worker.last_beat > after and worker.is_ready:
+            return (worker.last_beat - after) * 1000
+        time.sleep(0.005)
+    raise TimeoutError("event loop is not ready")
+
+
+def main(rounds: int = 3):
+    app = QApplication(sys.argv)
+    cold, standby = [], []
+    for _ in range(rounds):
+        extractor = TextExtractor()
+        start = time.monotonic()
+        extractor.start_event_loop()
+        cold.append(wait_ready(app, extractor, extractor.active_worker, start))
+
+        extractor.start_standby()
+        wait_ready(app, extractor, extractor.standby_worker, time.monotonic())
+        start = time.monotonic()
+        extractor.failover()
+        standby.append(wait_ready(app, extractor, extractor.active_worker, start))
+        extractor.stop_event_loop()
+
+    print(f"cold start  p50={statistics.median(cold):8.1f}ms  max={max(cold):8.1f}ms")
+    print(f"standby     p50={statistics.median(standby):8.1f}ms  max={max(standby):8.1f}ms")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
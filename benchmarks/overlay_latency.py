@@ -0,0 +1,55 @@
+# Latency from hotkey to visible overlay: reused overlay against application, settings and overlay created
+#   per hotkey as before
+#   python -m benchmarks.overlay_latency [iterations]
+import statistics
+import sys
+import time
+from PyQt5.QtCore import QEvent, QTimer
+from PyQt5.QtWidgets import QApplication
+from apps.config import Settings
+from apps.screenshot import SnippingWidget
+
+
+def show_once(widget: SnippingWidget, requested_at: float) -> float:
+    latencies = []
+    widget.shown.connect(latencies.append)
+    widget.start(requested_at)
+    # process events until overlay is painted
+    while not latencies:
+        QApplication.processEvents()
+    widget.shown.disconnect(latencies.append)
+    widget.hide()
+    QApplication.restoreOverrideCursor()
+    return latencies[0]
+
+
+def main(iterations: int = 20):
+    cold = []
+    for _ in range(iterations):
+        requested_at = time.perf_counter()
+        # previous behaviour: new application, settings and widget for every hotkey
+        app = QApplication([])
+        widget = SnippingWidget(settings=Settings())
+        cold.append(show_once(widget, requested_at))
+        # widget is deleted before its application, only one application can exist at a time
+        widget.deleteLater()
+        QApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+        del widget
+        app.quit()
+        del app
+
+    app = QApplication([])
+    app.setQuitOnLastWindowClosed(False)
+    warm = []
+    widget = SnippingWidget()
+    for _ in range(iterations):
+        warm.append(show_once(widget, time.perf_counter()))
+
+    for name, timings in (("new app", cold), ("reused", warm)):
+        print(f"{name:<11} p50={statistics.median(timings):7.1f}ms  max={max(timings):7.1f}ms")
+    QTimer.singleShot(0, app.quit)
+    app.exec_()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
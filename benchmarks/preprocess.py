@@ -0,0 +1,54 @@
+# Effect of preprocessing profiles on tesseract time and character error rate
+#   python -m benchmarks.preprocess [languages]
+import sys
+import time
+import cv2
+import numpy as np
+from apps.engine import create_engine
+from apps.preprocess import PROFILES, STAGES, Preprocessor
+from benchmarks.accuracy import char_error_rate
+from benchmarks.synthetic import random_lines, render_lines
+
+
+def themed_images() -> dict[str, tuple[np.ndarray, str]]:
+    lines = random_lines(12, seed=7)
+    text = "\n".join(lines)
+    light = render_lines(lines)
+    dark = render_lines(lines, dark=True)
+    # grey text on grey panel
+    low_contrast = (render_lines(lines).astype(np.float32) * 0.25 + 150).astype(np.uint8)
+    height, width = light.shape
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), 4, 1.0)
+    skewed = cv2.warpAffine(light, matrix, (width, height), borderValue=255)
+    noisy = np.clip(light + np.random.default_rng(0).normal(0, 25, light.shape), 0, 255).astype(np.uint8)
+    return {"light": (light, text), "dark": (dark, text), "low_contrast": (low_contrast, text),
+            "skewed": (skewed, text), "noisy": (noisy, text)}
+
+
+def timed(function, *args) -> tuple[object, float]:
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main(languages: str = "eng"):
+    engine = create_engine(languages)
+    images = themed_images()
+
+    print("stage cost on 900px wide capture")
+    light = images["light"][0]
+    for name, function in STAGES.items():
+        print(f"  {name:<14} {timed(function, light)[1]:7.2f}ms")
+
+    print(f"\n{'image':<13} {'profile':<13} {'prep':>8} {'ocr':>9} {'cer':>7}")
+    for image_name, (image, text) in images.items():
+        for profile in PROFILES:
+            processed, prep_ms = timed(Preprocessor.from_profile(profile), image)
+            result, ocr_ms = timed(engine.image_to_string, processed)
+            print(f"{image_name:<13} {profile:<13} {prep_ms:7.2f}ms {ocr_ms:8.1f}ms "
+                  f"{char_error_rate(text, result):7.3f}")
+    engine.close()
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
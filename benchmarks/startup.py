@@ -0,0 +1,120 @@
+# Startup time: imports of tray process and time until tray icon, hotkey and OCR are ready
+#   python -m benchmarks.startup [--runs N] [--timeout S] [--budget MS]
+#   app is started as usual (python main.py), stages are marked into file of TEXT_EXTRACTOR_STARTUP_LOG,
+#   exit code is 1 if tray is shown slower than budget or tray process imports OCR modules
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from apps.metrics import STARTUP_LOG_ENV
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGES = ("tray_visible", "hotkey_ready", "ocr_ready")
+# modules which are needed only by event loop process
+HEAVY_MODULES = ("numpy", "cv2", "PIL", "pytesseract", "tesserocr", "keyboard", "pyperclip", "mss")
+
+# modules are checked after tray is built as in main.py, not only after import
+IMPORT_SCRIPT = """
+import json, os, sys, time
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+start = time.perf_counter()
+import apps.tray
+ms = (time.perf_counter() - start) * 1000
+from PyQt5.QtWidgets import QApplication
+from apps.config import get_settings
+from apps.tessinfo import get_version
+app = QApplication(sys.argv)
+try:
+    get_version()
+except OSError:  # tesseract is not installed, tray shows error
+    pass
+tray = apps.tray.TrayApp(get_settings())
+heavy = [name for name in %r if name in sys.modules]
+print(json.dumps({"ms": ms, "heavy": heavy}))
+os._exit(0)
+""" % (HEAVY_MODULES,)
+
+
+def measure_imports() -> dict:
+    # fresh interpreter, so modules are not cached by this process
+    result = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], cwd=ROOT, capture_output=True, text=True,
+                            check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def read_marks(path: str) -> list[dict]:
+    try:
+        with open(path, encoding="utf-8") as file:
+            return [json.loads(line) for line in file if line.endswith("\n")]
+    except FileNotFoundError:
+        return []
+
+
+def stop(pids: set[int]):
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:  # process is already closed
+            pass
+
+
+def measure_startup(timeout: float) -> dict[str, float]:
+    """
+    Starting app once and waiting for all stages
+    :return: stage -> ms from start of interpreter, missing stages are not included
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "startup.jsonl")
+        env = {**os.environ, STARTUP_LOG_ENV: path}
+        started_at = time.time()
+        process = subprocess.Popen([sys.executable, "main.py"], cwd=ROOT, env=env)
+        marks = []
+        try:
+            while time.time() - started_at < timeout and process.poll() is None:
+                marks = read_marks(path)
+                if {mark["stage"] for mark in marks} >= set(STAGES):
+                    break
+                time.sleep(0.01)
+        finally:
+            # event loop process is not a child of Popen on every platform, so it is stopped by its pid
+            stop({mark["pid"] for mark in marks} - {process.pid})
+            process.terminate()
+            process.wait()
+    return {mark["stage"]: (mark["time"] - started_at) * 1000 for mark in marks if mark["stage"] in STAGES}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for each run")
+    parser.add_argument("--budget", type=float, default=1000.0, help="max p50 time to tray icon in ms")
+    args = parser.parse_args(argv)
+
+    imports = measure_imports()
+    print(f"tray imports      {imports['ms']:7.1f}ms  heavy modules: {', '.join(imports['heavy']) or 'none'}")
+
+    timings: dict[str, list[float]] = {stage: [] for stage in STAGES}
+    for _ in range(args.runs):
+        for stage, ms in measure_startup(args.timeout).items():
+            timings[stage].append(ms)
+    for stage, values in timings.items():
+        if values:
+            print(f"{stage:<17} p50={statistics.median(values):7.1f}ms  max={max(values):7.1f}ms  "
+                  f"runs={len(values)}")
+        else:
+            print(f"{stage:<17} not reached")
+
+    tray = timings["tray_visible"]
+    ok = not imports["heavy"] and bool(tray) and statistics.median(tray) <= args.budget
+    if not ok:
+        print(f"startup budget of {args.budget:.0f} ms is exceeded", file=sys.stderr)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+# Latency, throughput and accuracy of the capture free part of pipeline
+#   decode -> preprocess -> OCR -> clipboard on synthetic images of different sizes, fonts,
+#   languages and themes. Images are rendered with fixed seeds, so runs are comparable
+#   python -m benchmarks.suite [--quick] [--iterations N] [--json results.json] [--thresholds FILE]
+#   exit code is 1 if any threshold is exceeded
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import numpy as np
+import PIL.Image
+import pytesseract
+from apps.pipeline import ExtractionPipeline
+from apps.preprocess import Preprocessor
+from benchmarks.accuracy import char_error_rate
+from benchmarks.synthetic import random_lines, render_lines
+
+STAGES = ("decode", "preprocess", "ocr", "clipboard")
+DEFAULT_THRESHOLDS = os.path.join(os.path.dirname(__file__), "thresholds.json")
+
+
+class Case:
+    def __init__(self, name: str, languages: str, lines: list[str], **render_options):
+        self.name = name
+        self.languages = languages
+        self.text = "\n".join(lines)
+        pixels = render_lines(lines, **render_options)
+        self.pixels = pixels.shape[0] * pixels.shape[1]
+        # captures reach pipeline as encoded image, e.g. saved screenshots of batch mode
+        buffer = io.BytesIO()
+        PIL.Image.fromarray(pixels).convert("RGB").save(buffer, "PNG")
+        self.png = buffer.getvalue()
+
+
+def build_cases(quick: bool = False) -> list[Case]:
+    languages = ["eng"]
+    try:
+        if "rus" in pytesseract.get_languages():
+            languages.append("rus")
+    except pytesseract.TesseractNotFoundError:
+        pass
+    sizes = {"line": 1, "dialog": 8} if quick else {"line": 1, "dialog": 8, "page": 40}
+    fonts = ("sans",) if quick else ("sans", "serif", "mono")
+    font_sizes = (16,) if quick else (12, 16, 22)
+    cases = []
+    for language in languages:
+        for size_name, line_count in sizes.items():
+            for font in fonts:
+                for font_size in font_sizes:
+                    for dark in (False, True):
+                        name = f"{language}/{size_name}/{font}{font_size}/{'dark' if dark else 'light'}"
+                        lines = random_lines(line_count, seed=len(cases), language=language)
+                        cases.append(Case(name, language, lines, font=font, font_size=font_size, dark=dark))
+    return cases
+
+
+def percentile(values: list[float], percent: float) -> float:
+    return float(np.percentile(values, percent)) if values else 0.0
+
+
+def copy_to_clipboard():
+    # clipboard is not available on headless machines, stage is skipped then
+    try:
+        import pyperclip
+        pyperclip.copy("")
+        return pyperclip.copy
+    except Exception:
+        return None
+
+
+def run(cases: list[Case], iterations: int, profile: str) -> dict:
+    timings = {stage: [] for stage in STAGES}
+    errors = []
+    copy = copy_to_clipboard()
+    preprocessor = Preprocessor.from_profile(profile)
+    pipelines = {}
+    pixels = 0
+    start = time.perf_counter()
+    for case in cases:
+        pipeline = pipelines.setdefault(case.languages, ExtractionPipeline(case.languages, block_parallel=False))
+        for _ in range(iterations):
+            stage_start = time.perf_counter()
+            with PIL.Image.open(io.BytesIO(case.png)) as image:
+                array = np.asarray(image)
+            decoded = time.perf_counter()
+            array = preprocessor(array)
+            preprocessed = time.perf_counter()
+            text = pipeline.run(array)
+            recognized = time.perf_counter()
+            if copy is not None:
+                copy(text)
+            copied = time.perf_counter()
+
+            for stage, (begin, end) in zip(STAGES, ((stage_start, decoded), (decoded, preprocessed),
+                                                    (preprocessed, recognized), (recognized, copied))):
+                timings[stage].append((end - begin) * 1000)
+            pixels += case.pixels
+        errors.append(char_error_rate(case.text, text))
+    elapsed = time.perf_counter() - start
+    for pipeline in pipelines.values():
+        pipeline.close()
+
+    total = [sum(values) for values in zip(*timings.values())]
+    return {
+        "cases": len(cases),
+        "iterations": iterations,
+        "profile": profile,
+        "clipboard": copy is not None,
+        "stages": {
+            stage: {"p50_ms": percentile(values, 50), "p95_ms": percentile(values, 95)}
+            for stage, values in (*timings.items(), ("total", total))
+        },
+        "throughput": {
+            "images_per_s": len(total) / elapsed,
+            "megapixels_per_s": pixels / elapsed / 1e6,
+        },
+        "accuracy": {
+            "mean_cer": statistics.mean(errors),
+            "max_cer": max(errors),
+        },
+        "cer_by_case": {case.name: error for case, error in zip(cases, errors)},
+    }
+
+
+def check(results: dict, thresholds: dict) -> list[str]:
+    # list of exceeded thresholds
+    failures = []
+    for stage, limits in thresholds.get("stages", {}).items():
+        for metric, limit in limits.items():
+            value = results["stages"][stage][metric]
+            if value > limit:
+                failures.append(f"{stage} {metric} {value:.1f} > {limit}")
+    for metric, limit in thresholds.get("accuracy", {}).items():
+        if results["accuracy"][metric] > limit:
+            failures.append(f"{metric} {results['accuracy'][metric]:.3f} > {limit}")
+    for metric, limit in thresholds.get("throughput", {}).items():
+        if results["throughput"][metric] < limit:
+            failures.append(f"{metric} {results['throughput'][metric]:.2f} < {limit}")
+    return failures
+
+
+def report(results: dict):
+    print(f"{results['cases']} cases x {results['iterations']} iterations, profile {results['profile']}")
+    for stage, values in results["stages"].items():
+        print(f"  {stage:<11} p50={values['p50_ms']:8.2f}ms  p95={values['p95_ms']:8.2f}ms")
+    if not results["clipboard"]:
+        print("  clipboard is not available, stage is skipped")
+    print(f"  throughput  {results['throughput']['images_per_s']:.2f} images/s, "
+          f"{results['throughput']['megapixels_per_s']:.2f} Mpx/s")
+    print(f"  accuracy    mean CER {results['accuracy']['mean_cer']:.3f}, max CER {results['accuracy']['max_cer']:.3f}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite")
+    parser.add_argument("--quick", action="store_true", help="small matrix of cases")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--profile", default="screen", help="preprocessing profile")
+    parser.add_argument("--json", help="save results to file")
+    parser.add_argument("--thresholds", default=DEFAULT_THRESHOLDS, help="JSON with regression thresholds")
+    args = parser.parse_args(argv)
+
+    results = run(build_cases(args.quick), args.iterations, args.profile)
+    report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2, ensure_ascii=False)
+
+    with open(args.thresholds, encoding="utf-8") as file:
+        failures = check(results, json.load(file))
+    for failure in failures:
+        print(f"REGRESSION: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+# Synthetic text images rendered with Pillow
+import random
+import PIL.Image
+import PIL.ImageDraw
+import PIL.ImageFont
+import numpy as np
+
+WORDS = {
+    "eng": ("the quick brown fox jumps over lazy dog extraction screenshot clipboard settings "
+            "language notification capture region tesseract window button error message table "
+            "value column report status file folder open save close cancel apply").split(),
+    "rus": ("быстрая коричневая лиса прыгает через ленивую собаку снимок экрана буфер обмена "
+            "настройки язык уведомление область окно кнопка ошибка сообщение таблица значение "
+            "столбец отчёт статус файл папка открыть сохранить закрыть отмена применить").split(),
+}
+# fonts which are usually installed on Windows and Linux, Pillow default font is used if none is found
+FONTS = {
+    "sans": ("DejaVuSans.ttf", "arial.ttf", "segoeui.ttf"),
+    "serif": ("DejaVuSerif.ttf", "times.ttf"),
+    "mono": ("DejaVuSansMono.ttf", "consola.ttf", "cour.ttf"),
+}
+
+
+def random_lines(count: int, words: int = 8, seed: int = 0, language: str = "eng") -> list[str]:
+    rnd = random.Random(seed)
+    vocabulary = WORDS[language]
+    return [" ".join(rnd.choice(vocabulary) for _ in range(words)) for _ in range(count)]
+
+
+def load_font(font: str | None, size: int) -> PIL.ImageFont.ImageFont:
+    """
+    :param font: family of FONTS or path of truetype font
+    """
+    for name in FONTS.get(font or "sans", (font,)):
+        try:
+            return PIL.ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    try:
+        return PIL.ImageFont.load_default(size)
+    except TypeError:  # Pillow < 10.1 has only bitmap default font
+        return PIL.ImageFont.load_default()
+
+
+def render_lines(lines: list[str], width: int = 900, font_size: int = 20, line_spacing: float = 1.6,
+                 dark: bool = False, font: str | None = None) -> np.ndarray:
+    """
+    Rendering lines of text as grayscale screen capture
+    :param font: family of FONTS or path of truetype font
+    :return: grayscale image
+    """
+    image_font = load_font(font, font_size)
+    background, foreground = (30, 225) if dark else (255, 0)
+    # lines are never cut by right border
+    width = max(width, max(int(image_font.getlength(line)) for line in lines) + font_size * 2)
+    step = int(font_size * line_spacing)
+    image = PIL.Image.new("L", (width, step * len(lines) + font_size * 2), background)
+    draw = PIL.ImageDraw.Draw(image)
+    for i, line in enumerate(lines):
+        draw.text((font_size, font_size + i * step), line, fill=foreground, font=image_font)
+    return np.asarray(image)
+
+
+def render_text(text: str = "The quick brown fox jumps over the lazy dog 0123456789", **kwargs) -> np.ndarray:
+    return render_lines([text], **kwargs)
+
+
+def render_page(lines: int = 60, columns: int = 1, **kwargs) -> np.ndarray:
+    # full page capture, columns are separated by wide gutter
+    pages = [render_lines(random_lines(lines, seed=i), **kwargs) for i in range(columns)]
+    gutter = np.full((pages[0].shape[0], 80), pages[0][0, 0], np.uint8)
+    parts = []
+    for page in pages:
+        parts.extend([page, gutter])
+    return np.hstack(parts[:-1])
@@ -0,0 +1,39 @@
+# Cost of frame of region watch: unchanged frame against frame scrolled by one line
+#   python -m benchmarks.watch [iterations]
+#   extraction is replaced by counter, so only diffing and line splitting are measured
+import statistics
+import sys
+import time
+from apps.watch import RegionWatcher
+from benchmarks.synthetic import random_lines, render_lines
+
+
+def main(iterations: int = 50):
+    lines = random_lines(iterations + 40, 8, seed=3)
+    frames = [render_lines(lines[i:i + 40], width=1200) for i in range(iterations + 1)]
+    recognized = []
+    watcher = RegionWatcher((0, 0, 1, 1), lambda image: recognized.append(image.shape) or "line", lambda text: None)
+    watcher.process(frames[0])
+
+    unchanged = []
+    for _ in range(iterations):
+        frame = frames[0].copy()
+        start = time.perf_counter()
+        watcher.process(frame)
+        unchanged.append((time.perf_counter() - start) * 1000)
+
+    scrolled = []
+    recognized.clear()
+    for frame in frames[1:]:
+        start = time.perf_counter()
+        watcher.process(frame)
+        scrolled.append((time.perf_counter() - start) * 1000)
+
+    print(f"frame {frames[0].shape[1]}x{frames[0].shape[0]}")
+    print(f"unchanged  p50={statistics.median(unchanged):7.2f}ms  max={max(unchanged):7.2f}ms")
+    print(f"scrolled   p50={statistics.median(scrolled):7.2f}ms  max={max(scrolled):7.2f}ms  "
+          f"recognized lines per frame={len(recognized) / iterations:.1f}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
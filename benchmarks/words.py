@@ -0,0 +1,46 @@
+# Memory and parse time of word boxes of full page: WordBoxes against dict for each word
+#   python -m benchmarks.words [words]
+import random
+import sys
+import time
+import tracemalloc
+from apps.words import TSV_HEADER, WordBoxes
+from benchmarks.synthetic import WORDS
+
+
+def make_tsv(count: int) -> str:
+    rnd = random.Random(0)
+    rows = [TSV_HEADER]
+    for index in range(count):
+        line, word = divmod(index, 10)
+        rows.append(f"5\t1\t{line // 20 + 1}\t1\t{line % 20 + 1}\t{word + 1}\t{word * 90}\t{line * 30}\t80\t22\t"
+                    f"{rnd.uniform(60, 99):.2f}\t{rnd.choice(WORDS['eng'])}")
+    return "\n".join(rows) + "\n"
+
+
+def parse_dicts(tsv: str) -> list[dict]:
+    # representation which is replaced by WordBoxes
+    names = TSV_HEADER.split("\t")
+    return [dict(zip(names, row.split("\t"))) for row in tsv.splitlines()[1:]]
+
+
+def measure(function, tsv: str) -> tuple[float, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(tsv)
+    ms = (time.perf_counter() - start) * 1000
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return ms, size
+
+
+def main(count: int = 5000):
+    tsv = make_tsv(count)
+    for name, function in (("dicts", parse_dicts), ("WordBoxes", WordBoxes.from_tsv)):
+        ms, size = measure(function, tsv)
+        print(f"{name:<10} {count} words  parse={ms:7.1f}ms  memory={size / 1024:8.1f}KiB")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
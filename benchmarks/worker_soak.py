@@ -0,0 +1,133 @@
+# Soak test of memory of OCR worker pool and pipeline: thousands of synthetic captures through OcrWorkerPool
+#   python -m benchmarks.worker_soak [--captures 2000] [--workers 2] [--max-heap-growth MB] [--max-rss-growth MB]
+#   each capture is new BGRA buffer like grab of mss, memory is sampled with tracemalloc and RSS,
+#   exit code is 1 if memory grows after warm up more than limits.
+#   hotkey, overlay, screen capture, clipboard and history of event loop are not exercised,
+#   their memory is checked by memory of running app only
+import argparse
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import numpy as np
+from apps.memory import limit_arenas, release_memory, rss_bytes
+from apps.pipeline import ExtractionPipeline
+from apps.preprocess import Preprocessor
+from apps.workers import OcrWorkerPool
+from benchmarks.synthetic import random_lines, render_lines
+
+MB = 1024 * 1024
+
+
+def make_frames(count: int = 6) -> list[np.ndarray]:
+    # selections of different sizes in light and dark theme, as BGRA buffers of screen
+    frames = []
+    for index in range(count):
+        gray = render_lines(random_lines(1 + index * 3, seed=index), width=300 + index * 150, dark=index % 2 == 1)
+        frame = np.empty(gray.shape + (4,), np.uint8)
+        frame[..., :3] = gray[..., None]
+        frame[..., 3] = 255
+        frames.append(frame)
+    return frames
+
+
+def run(captures: int, workers: int, sample_every: int) -> list[tuple[int, int, int | None]]:
+    """
+    :return: samples of (count of captures, traced heap bytes, RSS bytes)
+    """
+    limit_arenas()
+    pipeline = ExtractionPipeline("eng", preprocessor=Preprocessor.from_profile("screen"), script_detection=False)
+    pipeline.warm_up(workers)
+    idle = threading.Event()
+
+    def on_idle():
+        release_memory()
+        idle.set()
+
+    errors: list[Exception] = []
+
+    def deliver(job):
+        # results are dropped, like clipboard keeps only last text, failed job means memory of errors is measured
+        if job.error is not None:
+            errors.append(job.error)
+
+    pool = OcrWorkerPool(pipeline.run, deliver, workers, on_idle)
+    frames = make_frames()
+    rnd = random.Random(0)
+    samples = []
+
+    def wait_idle(submitted: int):
+        # pool can be idle between captures of burst, so count of delivered jobs is checked too
+        while True:
+            idle.wait()
+            idle.clear()
+            if pool.stats()["done"] == submitted:
+                return
+
+    tracemalloc.start()
+    try:
+        done = 0
+        next_sample = sample_every
+        while done < captures:
+            # captures come alone or in short bursts
+            for _ in range(min(rnd.randint(1, 3), captures - done)):
+                pool.submit(rnd.choice(frames).copy())
+                done += 1
+            wait_idle(done)
+            if errors:
+                raise RuntimeError(f"ocr job is failed, soak is stopped: {type(errors[0]).__name__}: {errors[0]}")
+            if done >= next_sample or done == captures:
+                samples.append((done, tracemalloc.get_traced_memory()[0], rss_bytes()))
+                next_sample = done - done % sample_every + sample_every
+    finally:
+        tracemalloc.stop()
+        pool.close()
+        pipeline.close()
+    return samples
+
+
+def growth(values: list[int]) -> float:
+    # growth in MB between median of first and last quarter of samples, single spikes are ignored
+    quarter = max(1, len(values) // 4)
+    return (float(np.median(values[-quarter:])) - float(np.median(values[:quarter]))) / MB
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.worker_soak",
+                                     description="Memory soak test of OCR worker pool")
+    parser.add_argument("--captures", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--sample-every", type=int, default=50)
+    parser.add_argument("--warm-up", type=int, default=200, help="captures before memory is expected to be flat")
+    parser.add_argument("--max-heap-growth", type=float, default=1.0, help="MB of Python heap (tracemalloc)")
+    parser.add_argument("--max-rss-growth", type=float, default=32.0, help="MB of resident memory")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        samples = run(args.captures, args.workers, args.sample_every)
+    except RuntimeError as ex:
+        print(ex, file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    for done, heap, rss in samples:
+        print(f"{done:6} captures  heap={heap / MB:8.2f}MB  rss=" + (f"{rss / MB:8.1f}MB" if rss else "unknown"))
+
+    flat = [sample for sample in samples if sample[0] > args.warm_up]
+    if len(flat) < 2:
+        print("not enough samples after warm up", file=sys.stderr)
+        return 1
+    heap_growth = growth([heap for _, heap, _ in flat])
+    print(f"{args.captures / elapsed:.1f} captures/s, heap growth {heap_growth:+.2f}MB "
+          f"(limit {args.max_heap_growth}MB)")
+    failed = heap_growth > args.max_heap_growth
+    if all(rss is not None for _, _, rss in flat):
+        rss_growth = growth([rss for _, _, rss in flat])
+        print(f"rss growth {rss_growth:+.1f}MB (limit {args.max_rss_growth}MB)")
+        failed |= rss_growth > args.max_rss_growth
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
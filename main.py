@@ -1,19 +1,21 @@
-# PyQt5 (QApplication for start app)
-import pytesseract
-from PyQt5.QtWidgets import QApplication
-from apps.config import Settings
-from apps.notification import show_wrong_msg
-# applications
-from apps.tray import TrayApp
 # default python modules
 from multiprocessing import freeze_support
 import sys
 
 
+# modules of app are imported in functions, not at top: spawned processes (hotkey listener, event loop)
+#   import this module again, small hotkey listener must not load Qt and tray with it
 def main():
+    # PyQt5 (QApplication for start app)
+    from PyQt5.QtWidgets import QApplication
+    from apps.config import get_settings
+    from apps.metrics import mark_startup
+    # applications
+    from apps.tray import TrayApp
+
     # create pyqt5 app
     app = QApplication(sys.argv)
-    settings = Settings()
+    settings = get_settings()
 
     # set options
     app.setQuitOnLastWindowClosed(False)
@@ -22,19 +24,22 @@ def main():
     # start tray
     tray = TrayApp(settings)
     tray.show()
+    mark_startup("tray_visible")
     # execute dynamic app code and get status code when app is finished
     # stop python interpolator with status code of app
     sys.exit(app.exec_())
 
 
 if __name__ == "__main__":
+    # To use pyinstaller with multiprocessing
+    if sys.platform.startswith('win'):
+        # On Windows calling this function is necessary, child process exits here before app is loaded.
+        freeze_support()
+    from apps.notification import show_wrong_msg
+    from apps.tessinfo import get_version
     try:
-        # check is tesseract exist(if not trow exception)
-        pytesseract.get_tesseract_version()
-        # To use pyinstaller with multiprocessing
-        if sys.platform.startswith('win'):
-            # On Windows calling this function is necessary.
-            freeze_support()
+        # check is tesseract exist(if not trow exception), version is cached until tesseract is changed
+        get_version()
         main()
     except Exception as ex:
         sys.exit(show_wrong_msg(ex))